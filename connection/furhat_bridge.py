@@ -1,18 +1,43 @@
 """Furhat connection bridge."""
 import asyncio
 import signal
-from typing import Optional
+import traceback
+from collections import OrderedDict, deque
+from typing import Optional, Set
 from furhat_realtime_api import AsyncFurhatClient, Events
 
 from plan.orchestrator import Orchestrator
 from plan.behavior_generator import BehaviorGenerator
+from plan.controller import ControllerModel
 from utils.print_utils import cprint
+from utils.trial_memory import TrialMemory
+
+_HAS_SIGTERM = hasattr(signal, 'SIGTERM')
+
+# A partial ASR hypothesis counts as stable after this many identical repeats over this long
+SPECULATIVE_MIN_REPEATS = 3
+SPECULATIVE_MIN_STABLE_SECONDS = 0.4
+# Interval for idle keep-alive requests so the Furhat socket never goes cold
+KEEPALIVE_INTERVAL_SECONDS = 15.0
+# Upper bound on memoized text -> confidence inferences per conversation turn
+CONFIDENCE_CACHE_SIZE = 256
+# Number of dialogue turns (user + robot entries) kept in memory
+DIALOG_HISTORY_LIMIT = 200
+# Minimum spacing between live "Recognizing" console updates (caps them at 20 Hz)
+PARTIAL_PRINT_INTERVAL_SECONDS = 0.05
 
 
 class FurhatBridge:
     """Bridge between the local planner and the Furhat robot."""
 
-    def __init__(self, host: str = "192.168.1.114", auth_key: Optional[str] = None, replay_only: bool = False, use_trial_memory: bool = True):
+    def __init__(
+        self,
+        host: str = "192.168.1.114",
+        auth_key: Optional[str] = None,
+        replay_only: bool = False,
+        use_trial_memory: bool = True,
+        record_trials: bool = False,
+    ):
         self.host = host
         self.auth_key = auth_key
         # Opening line: self-intro + task framing
@@ -21,9 +46,11 @@ class FurhatBridge:
             "dilemma questions: I will think first, then give a conclusion and a brief reason."
         )
         self.stop_event: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         self.shutting_down = False
         self.replay_only = replay_only
         self.use_trial_memory = use_trial_memory
+        self.record_trials = record_trials
         # When replaying stored trials, skip thinking behaviors if requested (default true for replay-only)
         self.skip_replay_thinking = replay_only
         self.disable_multimodal = replay_only  # disable gestures/expressions in replay-only mode
@@ -37,10 +64,27 @@ class FurhatBridge:
             disable_multimodal=self.disable_multimodal,
         )
         
+        # Loaded once and shared by every turn, so answers given this session replay on repeats
+        self.trial_memory = TrialMemory()
+
         # Conversation history
-        self.dialog_history = []
+        self.dialog_history: "deque[dict]" = deque(maxlen=DIALOG_HISTORY_LIMIT)
         self.current_user_utt: Optional[str] = None
         self.orchestrator_task: Optional[asyncio.Task] = None
+        # Streamed answer playback that outlives its orchestrator task (not cancelled by barge-in)
+        self._answer_playback: Optional[asyncio.Task] = None
+        # Strong references to in-flight tasks so they cannot be garbage-collected mid-run
+        self._pending_tasks: Set[asyncio.Task] = set()
+        # Speculative controller decision started from a stable partial hypothesis
+        self._last_partial = ""
+        self._partial_repeats = 0
+        self._partial_since = 0.0
+        self._speculative_text: Optional[str] = None
+        self._speculative_decision: Optional[asyncio.Future] = None
+        self._last_partial_print = 0.0
+        self._keepalive_task: Optional[asyncio.Task] = None
+        # Text-based confidence inference per spoken text (LRU, cleared after each flushed turn)
+        self._confidence_cache: "OrderedDict[str, str]" = OrderedDict()
 
     def setup_signal_handlers(self):
         """Install signal handlers for graceful shutdown."""
@@ -53,9 +97,28 @@ class FurhatBridge:
                 self.stop_event.set()
         
         signal.signal(signal.SIGINT, signal_handler)
-        if hasattr(signal, 'SIGTERM'):
+        if _HAS_SIGTERM:
             signal.signal(signal.SIGTERM, signal_handler)
 
+    def _install_loop_signal_handlers(self):
+        """Register stop signals on the event loop, falling back to signal.signal."""
+        signals = [signal.SIGINT]
+        if _HAS_SIGTERM:
+            signals.append(signal.SIGTERM)
+        try:
+            for signum in signals:
+                self._loop.add_signal_handler(signum, self._on_stop_signal, signum)
+        except (NotImplementedError, RuntimeError):
+            # Windows event loops do not support add_signal_handler
+            self.setup_signal_handlers()
+
+    def _on_stop_signal(self, signum: int):
+        """Wake the main loop immediately when a stop signal arrives."""
+        signal_name = "SIGINT" if signum == signal.SIGINT else f"SIGTERM ({signum})"
+        cprint(f"\nReceived {signal_name}, shutting down gracefully...")
+        if self.stop_event is not None:
+            self.stop_event.set()
+
     async def shutdown(self):
         """Shut down gracefully."""
         if self.shutting_down:
@@ -64,6 +127,11 @@ class FurhatBridge:
         self.shutting_down = True
         cprint("Shutting down...")
         
+        if self._keepalive_task and not self._keepalive_task.done():
+            self._keepalive_task.cancel()
+        if self._answer_playback and not self._answer_playback.done():
+            self._answer_playback.cancel()
+
         try:
             # Cancel any pending orchestrator task
             self.cancel_request()
@@ -76,16 +144,45 @@ class FurhatBridge:
         if self.stop_event is not None:
             self.stop_event.set()
 
-    def commit_user(self):
-        """Store the latest user utterance in the dialogue history."""
-        if self.current_user_utt is None:
-            return
-        self.dialog_history.append({"role": "user", "content": self.current_user_utt})
-        self.current_user_utt = None
+    async def _keepalive_loop(self):
+        """Periodically touch the Furhat connection while the dialogue is idle."""
+        while not self.shutting_down:
+            await asyncio.sleep(KEEPALIVE_INTERVAL_SECONDS)
+            if self.shutting_down:
+                break
+            # Never override gaze during a request (thinking uses look_at targets)
+            if self.orchestrator_task and not self.orchestrator_task.done():
+                continue
+            try:
+                await self.furhat.request_attend_user()
+            except Exception as e:
+                cprint(f"[System] Keep-alive request failed: {e}")
 
-    def commit_robot(self, message: str):
-        """Store the robot reply in the dialogue history."""
-        self.dialog_history.append({"role": "assistant", "content": message})
+    def _flush_turn(self, user_text: Optional[str], robot_text: str):
+        """Record a finished turn (user utterance, if any, plus robot reply) in one append."""
+        robot_entry = {"role": "assistant", "content": robot_text}
+        if user_text is None:
+            self.dialog_history.append(robot_entry)
+        else:
+            self.dialog_history.extend(({"role": "user", "content": user_text}, robot_entry))
+        self._confidence_cache.clear()
+
+    def _infer_confidence(self, robot_text: str) -> str:
+        """Infer confidence for spoken text, memoizing the text heuristic."""
+        # A confidence stored by the orchestrator always wins and must be consumed
+        pending = self.behavior_generator.consume_pending_confidence()
+        if pending:
+            return pending
+        cache = self._confidence_cache
+        confidence = cache.get(robot_text)
+        if confidence is not None:
+            cache.move_to_end(robot_text)
+            return confidence
+        confidence = self.behavior_generator.infer_confidence_from_text(robot_text)
+        cache[robot_text] = confidence
+        if len(cache) > CONFIDENCE_CACHE_SIZE:
+            cache.popitem(last=False)
+        return confidence
 
     def cancel_request(self):
         """Cancel the current orchestrator task if it is still running."""
@@ -94,11 +191,70 @@ class FurhatBridge:
             cprint("[System] Cancelling request...")
             self.orchestrator_task.cancel()
 
+    def _reset_speculation(self):
+        """Forget partial tracking and drop any speculative decision."""
+        self._last_partial = ""
+        self._partial_repeats = 0
+        self._partial_since = 0.0
+        self._speculative_text = None
+        if self._speculative_decision is not None:
+            # A running executor job cannot be interrupted; its result is simply discarded
+            self._speculative_decision.cancel()
+            self._speculative_decision = None
+
+    def _maybe_start_speculation(self, partial_text: str):
+        """Start the controller call early once the partial hypothesis stops changing."""
+        text = partial_text.strip()
+        if not text or self.replay_only:
+            return
+        if self.orchestrator_task and not self.orchestrator_task.done():
+            return
+
+        now = self._loop.time()
+        if text != self._last_partial:
+            self._last_partial = text
+            self._partial_repeats = 1
+            self._partial_since = now
+            return
+        self._partial_repeats += 1
+
+        if text == self._speculative_text:
+            return
+        if self._partial_repeats < SPECULATIVE_MIN_REPEATS:
+            return
+        if now - self._partial_since < SPECULATIVE_MIN_STABLE_SECONDS:
+            return
+
+        try:
+            controller = ControllerModel(text)
+        except RuntimeError as err:
+            cprint(f"[System] Speculative decision skipped: {err}")
+            return
+        if self._speculative_decision is not None:
+            self._speculative_decision.cancel()
+        self._speculative_text = text
+        self._speculative_decision = self._loop.create_task(controller.decide_async())
+        # Retrieve exceptions of discarded speculations so they are not reported as unhandled
+        self._speculative_decision.add_done_callback(
+            lambda fut: fut.cancelled() or fut.exception()
+        )
+
+    def _take_speculative_decision(self, final_text: str) -> Optional[asyncio.Future]:
+        """Return the speculative decision if it was made for the final text."""
+        decision = None
+        if self._speculative_decision is not None and self._speculative_text == final_text:
+            decision = self._speculative_decision
+            self._speculative_decision = None
+            cprint("[System] Reusing speculative controller decision")
+        self._reset_speculation()
+        return decision
+
     async def on_hear_start(self, event):
         """Handle the start of a user utterance."""
         if not self.shutting_down:
             cprint("\n[User] Started speaking...")
             self.cancel_request()
+            self._reset_speculation()
 
     async def on_hear_end(self, event):
         """Handle the end of a user utterance."""
@@ -108,21 +264,30 @@ class FurhatBridge:
         # Ignore new input if a previous request is still active
         if self.orchestrator_task and not self.orchestrator_task.done():
             cprint("[System] Previous request still processing, ignoring new input")
+            self._reset_speculation()
             return
         
         user_text = event.get("text", "").strip()
+        decision_future = self._take_speculative_decision(user_text)
         if not user_text:
             return
         
         cprint(f"[User] Speech content: {user_text}")
         self.current_user_utt = user_text
-        self.orchestrator_task = asyncio.create_task(self._process_user_input(user_text))
+        task = self._loop.create_task(self._process_user_input(user_text, decision_future))
+        self._pending_tasks.add(task)
+        task.add_done_callback(self._pending_tasks.discard)
+        self.orchestrator_task = task
 
     async def on_hear_partial(self, event):
         """Handle partial ASR hypotheses."""
         if not self.shutting_down:
             partial_text = event.get("text", "")
-            cprint(f"[User] Recognizing: {partial_text}", end='\r')
+            now = self._loop.time()
+            if now - self._last_partial_print >= PARTIAL_PRINT_INTERVAL_SECONDS:
+                self._last_partial_print = now
+                cprint(f"[User] Recognizing: {partial_text}", end='\r')
+            self._maybe_start_speculation(partial_text)
 
     async def on_speak_start(self, event):
         """Handle robot speech start and trigger multimodal behaviors."""
@@ -133,10 +298,15 @@ class FurhatBridge:
                 return
 
             cprint(f"[Robot] Started speaking: {robot_text}")
-            self.commit_user()
+            if (
+                self.behavior_generator.answer_chunk_run(robot_text) is not None
+                and not self.behavior_generator.has_pending_confidence()
+            ):
+                # Later chunks of a streamed answer: gestures already fired with the first one
+                return
 
             # Infer confidence based on the spoken prefix and fire behaviors
-            confidence = self.behavior_generator.infer_confidence_from_text(robot_text)
+            confidence = self._infer_confidence(robot_text)
             prefix, gesture, expression = self.behavior_generator.get_full_confidence_behavior(confidence)
             cprint(f"[System] Inferred confidence: {confidence}")
             cprint(f"[System] Multimodal behaviors: gesture={gesture}, expression={expression}")
@@ -148,19 +318,37 @@ class FurhatBridge:
     async def on_speak_end(self, event):
         """Handle robot speech end events."""
         if not self.shutting_down:
-            robot_text = event.get("text", "")
-            aborted = event.get("aborted", False)
+            get = event.get
+            robot_text = get("text", "")
+            aborted = get("aborted", False)
             if self.behavior_generator.is_in_thinking_mode():
                 if aborted:
                     cprint(f"[Robot][thinking] Speech interrupted: {robot_text}")
                 return
             if aborted:
                 cprint(f"[Robot] Speech interrupted: {robot_text}")
-            self.commit_robot(robot_text)
-            # Allow the next input to be processed
+            if self.behavior_generator.release_answer_chunk(robot_text) is not None:
+                # A chunk of a streamed answer: _process_user_input records that turn, even
+                # when this event arrives after the run has finished
+                return
+            self._flush_turn(self.current_user_utt, robot_text)
+            self.current_user_utt = None
+            # Allow the next input to be processed; _pending_tasks keeps the task alive
             self.orchestrator_task = None
 
-    async def _process_user_input(self, user_text: str):
+    def _adopt_answer_playback(self, task: asyncio.Task):
+        """Keep streamed answer playback alive after its request finished, reporting failures."""
+        self._answer_playback = task
+        self._pending_tasks.add(task)
+
+        def done(fut: asyncio.Task):
+            self._pending_tasks.discard(fut)
+            if not fut.cancelled() and fut.exception() is not None:
+                cprint(f"[System] Answer playback failed: {fut.exception()}")
+
+        task.add_done_callback(done)
+
+    async def _process_user_input(self, user_text: str, decision_future: Optional[asyncio.Future] = None):
         """Pass user text to the orchestrator."""
         try:
             # Provide the Furhat client so the orchestrator can send speech
@@ -168,27 +356,60 @@ class FurhatBridge:
                 user_text, 
                 behavior_generator=self.behavior_generator,
                 furhat_client=self.furhat,
+                trial_memory=self.trial_memory,
                 replay_only=self.replay_only,
                 skip_replay_thinking=self.skip_replay_thinking,
                 use_trial_memory=self.use_trial_memory,
+                decision_future=decision_future,
+                persist_trials=self.record_trials,
             )
             await orchestrator.run()
-            # Clear the task upon completion
-            self.orchestrator_task = None
-                
+            if orchestrator.speech_task is not None:
+                self._adopt_answer_playback(orchestrator.speech_task)
+            if orchestrator.answer_streamed:
+                # The only place a streamed answer is recorded (on_speak_end skips its chunks)
+                self._flush_turn(user_text, orchestrator.current_answer_text)
+                self.current_user_utt = None
+
         except asyncio.CancelledError:
             cprint("[System] Request cancelled")
-            self.orchestrator_task = None
+            # Cut off any in-flight speech right away, then let the cancellation propagate
+            try:
+                await self.furhat.request_speak_stop()
+            except Exception as e:
+                cprint(f"[System] Failed to stop speech after cancel: {e}")
+            raise
         except Exception as e:
             cprint(f"\n❌ Error processing user input: {e}")
-            import traceback
             traceback.print_exc()
-            self.orchestrator_task = None
+        finally:
+            # Clear the marker only if a newer request has not replaced it
+            if self.orchestrator_task is asyncio.current_task():
+                self.orchestrator_task = None
+
+    async def _wait_for_stop(self):
+        """Supervise background tasks until stop_event is set, then cancel them."""
+        if hasattr(asyncio, "TaskGroup"):
+            async with asyncio.TaskGroup() as tg:
+                self._keepalive_task = tg.create_task(self._keepalive_loop())
+                await self.stop_event.wait()
+                self._keepalive_task.cancel()
+            return
+
+        # Python < 3.11: cancel and reap the background task explicitly
+        self._keepalive_task = self._loop.create_task(self._keepalive_loop())
+        try:
+            await self.stop_event.wait()
+        finally:
+            self._keepalive_task.cancel()
+            await asyncio.gather(self._keepalive_task, return_exceptions=True)
 
     async def run(self):
         """Main dialogue loop."""
         self.stop_event = asyncio.Event()
-        self.setup_signal_handlers()
+        # Cache the loop once; event handlers schedule work on it directly
+        self._loop = asyncio.get_running_loop()
+        self._install_loop_signal_handlers()
         cprint("Starting dialogue...")
         cprint("Press Ctrl+C to stop gracefully")
         
@@ -205,11 +426,11 @@ class FurhatBridge:
         self.furhat.add_handler(Events.response_speak_start, self.on_speak_start)
         self.furhat.add_handler(Events.response_speak_end, self.on_speak_end)
 
-        # Look at the user
-        await self.furhat.request_attend_user()
-
-        # Deliver the greeting
-        await self.furhat.request_speak_text(self.conversation_starter)
+        # Look at the user while delivering the greeting (independent requests)
+        await asyncio.gather(
+            self.furhat.request_attend_user(),
+            self.furhat.request_speak_text(self.conversation_starter),
+        )
 
         # Start listening with partial hypotheses enabled
         await self.furhat.request_listen_start(
@@ -222,8 +443,8 @@ class FurhatBridge:
             end_speech_timeout=2.5  # allow longer pause for long questions
         )
 
-        # Wait for shutdown signal
-        await self.stop_event.wait()
+        # Wait for shutdown signal while background tasks run
+        await self._wait_for_stop()
 
         # Begin shutdown
         cprint("Shutting down...")
@@ -1,22 +1,44 @@
 """Main entry point controlling whether to use the planning module."""
 import sys
 import os
+import traceback
 
-# Add project root to sys.path before importing local modules
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Add project root to sys.path before importing local modules. `python main.py` already
+# puts it first, so only prepend when launched another way (e.g. via runpy or an IDE).
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
 import asyncio
 import argparse
-from connection.furhat_bridge import FurhatBridge
+import logging
+from typing import TYPE_CHECKING
 from utils.print_utils import cprint
-from plan.orchestrator import Orchestrator
 
+if TYPE_CHECKING:
+    from connection.furhat_bridge import FurhatBridge
 
-async def _run_bridge(bridge: FurhatBridge):
+
+async def _run_bridge(bridge: "FurhatBridge"):
     """Run the bridge event loop asynchronously."""
     await bridge.run()
 
 
+def _run_async(coro):
+    """Run a coroutine to completion, on uvloop when it is installed."""
+    try:
+        import uvloop
+    except ImportError:
+        # uvloop is optional (and unavailable on Windows); keep the default loop
+        return asyncio.run(coro)
+    if hasattr(asyncio, "Runner"):
+        # Python 3.11+: pass the loop factory instead of changing the global policy
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            return runner.run(coro)
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return asyncio.run(coro)
+
+
 def main():
     """Main function: optionally run without the planning module or in test mode."""
     parser = argparse.ArgumentParser(description="Furhat dialogue system")
@@ -52,35 +74,54 @@ def main():
         action="store_true",
         help="Ignore my_trials.json (force model path and no caching)"
     )
+    parser.add_argument(
+        "--record-trials",
+        action="store_true",
+        help="Save new model answers to my_trials.json so later runs replay them"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Show per-gesture diagnostics from the behavior generator"
+    )
     args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    if args.verbose:
+        logging.getLogger("plan").setLevel(logging.DEBUG)
 
     if args.test:
+        # Imported lazily so --help and argument errors skip the planner's dependencies
+        from plan.orchestrator import Orchestrator
+
         question = input("Test question (press Enter to use default): ").strip() or "How do you show thinking?"
         cprint("Test mode: running language and thinking pipeline only")
         orchestrator = Orchestrator(
             question,
             replay_only=args.replay_only,
             use_trial_memory=not args.no_trials,
+            persist_trials=args.record_trials,
         )
         try:
-            asyncio.run(orchestrator.run())
+            _run_async(orchestrator.run())
         except KeyboardInterrupt:
             cprint("\nTest interrupted by user")
         except RuntimeError as err:
             cprint(f"Configuration error: {err}")
         except Exception as err:
             cprint(f"Unexpected error: {err}")
-            import traceback
             traceback.print_exc()
         return
 
     try:
+        from connection.furhat_bridge import FurhatBridge
+
         # Create the Furhat bridge
         bridge = FurhatBridge(
             host=args.host,
             auth_key=args.auth_key,
             replay_only=args.replay_only,
             use_trial_memory=not args.no_trials,
+            record_trials=args.record_trials,
         )
         
         if args.no_plan:
@@ -88,7 +129,7 @@ def main():
             # Insert custom logic for no-plan mode here if needed
         
         # Run the main event loop
-        asyncio.run(_run_bridge(bridge))
+        _run_async(_run_bridge(bridge))
         
     except KeyboardInterrupt:
         cprint("\nInterrupted by user")
@@ -96,7 +137,6 @@ def main():
         cprint(f"Configuration error: {err}")
     except Exception as err:
         cprint(f"Unexpected error: {err}")
-        import traceback
         traceback.print_exc()
 
 
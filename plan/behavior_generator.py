@@ -1,28 +1,69 @@
 """Behavior generator: translate action descriptions into Furhat API calls."""
-import json
-from pathlib import Path
-from typing import Optional, Tuple, Dict, Any, List
+import asyncio
+import logging
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from operator import itemgetter
+from types import MappingProxyType
+from typing import Optional, Tuple, Dict, Any, Mapping
 from furhat_realtime_api import AsyncFurhatClient
 from utils.print_utils import cprint
 from plan.thinking_config import get_thinking_config
 
+# Per-gesture diagnostics; enable with --verbose (failures are always shown as warnings)
+logger = logging.getLogger(__name__)
+
+# Spoken hedges that reveal the confidence tier; anything else counts as medium.
+# Model output may use a curly apostrophe or drop it entirely ("Im not sure").
+_CONFIDENCE_CUES = re.compile(
+    r"(?P<low>\bi['\u2019]?m not (?:entirely )?sure)|(?P<high>\bi['\u2019]?m (?:confident|certain))",
+    re.IGNORECASE,
+)
+
+_XYZ = itemgetter("x", "y", "z")
+
+# Most streamed answer chunks remembered while their speech events are outstanding
+ANSWER_CHUNK_LIMIT = 64
+
+
+@lru_cache(maxsize=1)
+def _load_thinking_script() -> Tuple[Mapping[str, Any], ...]:
+    """Load scripted thinking behaviors once per process as read-only entries."""
+    # get_thinking_config already filters entries down to dicts (and handles the legacy file)
+    behaviors = get_thinking_config().get("behaviors") or []
+    return tuple(MappingProxyType(dict(entry)) for entry in behaviors)
+
 
 class BehaviorGenerator:
     """Convert confidence levels and action descriptions into multimodal behaviors."""
 
     # Confidence tier to (verbal prefix, base gesture, expression) — LED removed globally
-    CONFIDENCE_BEHAVIORS: Dict[str, Tuple[str, str, str]] = {
+    CONFIDENCE_BEHAVIORS: Mapping[str, Tuple[str, str, str]] = MappingProxyType({
         "low": ("I'm not entirely sure, but", "slight head shake", "Oh"),
         "medium": ("Let me think", "look straight", "Thoughtful"),
         "high": ("I'm confident that", "nod head", "BigSmile"),
-    }
+    })
+    _VALID_CONF = frozenset(CONFIDENCE_BEHAVIORS)
+    # Unknown tiers fall back to medium
+    _DEFAULT_BEHAVIOR: Tuple[str, str, str] = CONFIDENCE_BEHAVIORS["medium"]
+
+    # Friendly LED color names to hex codes (unknown names fall back to blue)
+    _LED_COLOR_MAP = MappingProxyType({
+        "red": "#FF0000",
+        "green": "#00FF00",
+        "blue": "#0066FF",
+        "yellow": "#FFC800",
+        "purple": "#9600FF",
+        "white": "#FFFFFF",
+    })
 
     # Legacy tuple format (verbal prefix + base gesture)
     @staticmethod
     def _get_legacy_behavior(confidence: str) -> Tuple[str, str]:
         """Return the two-field legacy format (verbal prefix + gesture)."""
         full = BehaviorGenerator.CONFIDENCE_BEHAVIORS.get(
-            confidence, ("Let me think", "look straight", "Oh")
+            confidence, BehaviorGenerator._DEFAULT_BEHAVIOR
         )
         return (full[0], full[1])
 
@@ -30,52 +71,67 @@ class BehaviorGenerator:
         self.furhat = furhat_client
         self.disable_multimodal = disable_multimodal
         self._thinking_mode = False
+        # Utterance text -> id of the orchestrator run that spoke it as a streamed answer chunk
+        self._answer_chunks: "OrderedDict[str, int]" = OrderedDict()
         self._pending_confidence: Optional[str] = None
-        self._thinking_script: List[Dict[str, Any]] = self._load_thinking_script()
-        self._spoken_thinking_steps: set[int] = set()
+        # Shared across instances; call _load_thinking_script.cache_clear() after editing the config
+        self._thinking_script = _load_thinking_script()
+        # One bit per scripted step: has it spoken in the current thinking window?
+        self._spoken_steps = bytearray((len(self._thinking_script) + 7) // 8)
 
     def get_confidence_behavior(self, confidence: str) -> Tuple[str, str]:
         """Return the verbal prefix and gesture for the given confidence tier."""
-        if confidence not in self.CONFIDENCE_BEHAVIORS:
-            confidence = "medium"
         return self._get_legacy_behavior(confidence)
 
     def get_full_confidence_behavior(self, confidence: str) -> Tuple[str, str, str]:
         """Return the full multimodal behavior tuple for the confidence tier."""
-        if confidence not in self.CONFIDENCE_BEHAVIORS:
-            confidence = "medium"
-        return self.CONFIDENCE_BEHAVIORS[confidence]
+        return self.CONFIDENCE_BEHAVIORS.get(confidence, self._DEFAULT_BEHAVIOR)
 
     @staticmethod
     def _normalize_location_target(value: Any) -> Optional[Dict[str, float]]:
         """Extract an {x,y,z} dict if provided."""
-        if isinstance(value, dict):
-            try:
-                return {
-                    "x": float(value["x"]),
-                    "y": float(value["y"]),
-                    "z": float(value["z"]),
-                }
-            except (KeyError, TypeError, ValueError):
-                return None
-        return None
+        if not isinstance(value, dict):
+            return None
+        try:
+            x, y, z = _XYZ(value)
+            return {"x": float(x), "y": float(y), "z": float(z)}
+        except (KeyError, TypeError, ValueError):
+            return None
 
     def set_thinking_mode(self, active: bool):
         """Flag that the robot is currently verbalizing visible thinking."""
         self._thinking_mode = active
         if not active:
             # Reset per-thinking-window state
-            self._spoken_thinking_steps.clear()
+            self._spoken_steps[:] = bytes(len(self._spoken_steps))
 
     def is_in_thinking_mode(self) -> bool:
         return self._thinking_mode
 
+    def mark_answer_chunk(self, text: str, run_id: int):
+        """Register an utterance as one chunk of a streamed answer (its run records the turn)."""
+        chunks = self._answer_chunks
+        chunks[text] = run_id
+        chunks.move_to_end(text)
+        # Chunks whose speech events never arrive (e.g. stopped speech) must not pile up
+        if len(chunks) > ANSWER_CHUNK_LIMIT:
+            chunks.popitem(last=False)
+
+    def answer_chunk_run(self, text: str) -> Optional[int]:
+        """Return the run id that streamed this utterance, or None if it is not a chunk."""
+        return self._answer_chunks.get(text)
+
+    def release_answer_chunk(self, text: str) -> Optional[int]:
+        """Forget a finished chunk and return the run id that streamed it (None if unknown)."""
+        return self._answer_chunks.pop(text, None)
+
+    def has_pending_confidence(self) -> bool:
+        """Return True if a resolved confidence is waiting for the next utterance."""
+        return self._pending_confidence is not None
+
     def set_pending_confidence(self, confidence: str):
         """Store the resolved confidence for the next utterance."""
-        if confidence in self.CONFIDENCE_BEHAVIORS:
-            self._pending_confidence = confidence
-        else:
-            self._pending_confidence = "medium"
+        self._pending_confidence = confidence if confidence in self._VALID_CONF else "medium"
 
     def consume_pending_confidence(self) -> Optional[str]:
         """Return and clear the stored confidence value."""
@@ -108,7 +164,7 @@ class BehaviorGenerator:
         if self._thinking_script:
             step_index = sequence_index % len(self._thinking_script)
             step = self._thinking_script[step_index]
-            cprint(f"[Thinking] Using scripted step: {step}")
+            cprint(f"[Thinking] Using scripted step: {dict(step)}")
             await self._apply_behavior_instruction(step, step_index=step_index)
             return
 
@@ -118,14 +174,13 @@ class BehaviorGenerator:
         gesture = gesture_cycle[sequence_index % len(gesture_cycle)]
         expression = expression_cycle[sequence_index % len(expression_cycle)]
 
-        import asyncio
         await asyncio.gather(
             self.execute_gesture(gesture),
             self.execute_gesture_expression(expression),
             return_exceptions=True
         )
 
-    async def _apply_behavior_instruction(self, instruction: Dict[str, Any], step_index: Optional[int] = None):
+    async def _apply_behavior_instruction(self, instruction: Mapping[str, Any], step_index: Optional[int] = None):
         """Execute gestures/expressions/look targets defined by the controller."""
         tasks = []
         gesture = instruction.get("gesture")
@@ -139,7 +194,7 @@ class BehaviorGenerator:
         speak_allowed = True
         if step_index is not None:
             # Only speak once per step per thinking window
-            if step_index in self._spoken_thinking_steps:
+            if self._spoken_steps[step_index >> 3] & (1 << (step_index & 7)):
                 speak_allowed = False
 
         if gesture:
@@ -149,34 +204,37 @@ class BehaviorGenerator:
         if look_at:
             tasks.append(self.execute_attend_location(look_at["x"], look_at["y"], look_at["z"]))
 
+        # Optional utterance during thinking, sent alongside the gestures
+        if utterance and self.furhat and speak_allowed:
+            tasks.append(self._speak_thinking_utterance(str(utterance), step_index))
+
         if tasks:
-            import asyncio
+            # All requests go out back-to-back; one failing must not block the others
             await asyncio.gather(*tasks, return_exceptions=True)
 
-        # Optional utterance during thinking
-        if utterance and self.furhat and speak_allowed:
-            try:
-                await self.furhat.request_speak_text(str(utterance))
-                cprint(f"[Thinking] Instruction utterance: {utterance}")
-                if step_index is not None:
-                    self._spoken_thinking_steps.add(step_index)
-            except Exception as e:
-                cprint(f"[Thinking] Failed to speak instruction utterance: {e}")
+    async def _speak_thinking_utterance(self, utterance: str, step_index: Optional[int]):
+        """Speak a thinking-step utterance and remember that the step has spoken."""
+        try:
+            await self.furhat.request_speak_text(utterance)
+            cprint(f"[Thinking] Instruction utterance: {utterance}")
+            if step_index is not None:
+                self._spoken_steps[step_index >> 3] |= 1 << (step_index & 7)
+        except Exception as e:
+            cprint(f"[Thinking] Failed to speak instruction utterance: {e}")
 
     async def execute_multimodal_behavior(self, confidence: str):
         """Perform the confidence-specific multimodal behavior."""
         if not self.furhat or self.disable_multimodal:
             return
 
-        prefix, gesture, expression = self.get_full_confidence_behavior(confidence)
-
-        import asyncio
-        tasks = []
-
-        tasks.append(self.execute_gesture(gesture))
-        tasks.append(self.execute_gesture_expression(expression))
+        _, gesture, expression = self.get_full_confidence_behavior(confidence)
 
-        await asyncio.gather(*tasks, return_exceptions=True)
+        # Issue both Furhat requests at once; one failing must not block the other
+        await asyncio.gather(
+            self.execute_gesture(gesture),
+            self.execute_gesture_expression(expression),
+            return_exceptions=True,
+        )
 
     async def execute_attend_location(self, x: float, y: float, z: float):
         """Move gaze/head to a specific point in meters relative to the robot."""
@@ -184,27 +242,21 @@ class BehaviorGenerator:
             return
         try:
             await self.furhat.request_attend_location(x, y, z)
-            print(f"[Multimodal] Attend location: x={x}, y={y}, z={z}")
+            logger.debug("[Multimodal] Attend location: x=%s, y=%s, z=%s", x, y, z)
         except Exception as e:
-            print(f"Failed to attend to location ({x}, {y}, {z}): {e}")
+            logger.warning("Failed to attend to location (%s, %s, %s): %s", x, y, z, e)
 
     async def execute_gesture(self, gesture_description: str):
         """Map a gesture description to a Furhat action call."""
         if not self.furhat:
             return
 
-        gesture_map = {
-            "slight head shake": self._shake_head_slightly,
-            "look straight": self._look_straight,
-            "nod head": self._nod_head,
-        }
-
-        gesture_func = gesture_map.get(gesture_description)
+        gesture_func = self._GESTURE_HANDLERS.get(gesture_description)
         if gesture_func:
             try:
-                await gesture_func()
+                await gesture_func(self)
             except Exception as e:
-                print(f"Failed to execute gesture {gesture_description}: {e}")
+                logger.warning("Failed to execute gesture %s: %s", gesture_description, e)
 
     async def execute_gesture_expression(self, expression: str):
         """Trigger a facial/gesture expression such as BigSmile or Thoughtful."""
@@ -216,29 +268,20 @@ class BehaviorGenerator:
                 intensity=0.7,
                 duration=1.0
             )
-            print(f"[Multimodal] Gesture expression: {expression}")
+            logger.debug("[Multimodal] Gesture expression: %s", expression)
         except Exception as e:
-            print(f"Failed to execute gesture expression {expression}: {e}")
+            logger.warning("Failed to execute gesture expression %s: %s", expression, e)
 
     async def execute_led_color(self, color: str):
         """Set LED color using a friendly color name."""
         if not self.furhat:
             return
         try:
-            color_map = {
-                "red": "#FF0000",
-                "green": "#00FF00",
-                "blue": "#0066FF",
-                "yellow": "#FFC800",
-                "purple": "#9600FF",
-                "white": "#FFFFFF",
-            }
-
-            hex_color = color_map.get(color.lower(), "#0066FF")
+            hex_color = self._LED_COLOR_MAP.get(color.lower(), "#0066FF")
             await self.furhat.request_led_set(color=hex_color)
-            print(f"[Multimodal] LED color: {color} ({hex_color})")
+            logger.debug("[Multimodal] LED color: %s (%s)", color, hex_color)
         except Exception as e:
-            print(f"Failed to set LED color {color}: {e}")
+            logger.warning("Failed to set LED color %s: %s", color, e)
 
     async def execute_led_color_hex(self, hex_color: str):
         """Set LED color directly from a hex code."""
@@ -246,9 +289,9 @@ class BehaviorGenerator:
             return
         try:
             await self.furhat.request_led_set(color=hex_color)
-            print(f"[Multimodal] LED color: {hex_color}")
+            logger.debug("[Multimodal] LED color: %s", hex_color)
         except Exception as e:
-            print(f"Failed to set LED color {hex_color}: {e}")
+            logger.warning("Failed to set LED color %s: %s", hex_color, e)
 
     async def _shake_head_slightly(self):
         """Trigger Furhat's Shake gesture with a lower intensity."""
@@ -260,9 +303,9 @@ class BehaviorGenerator:
                 intensity=0.5,
                 duration=0.8
             )
-            print("[Multimodal] Gesture: Shake")
+            logger.debug("[Multimodal] Gesture: Shake")
         except Exception as e:
-            print(f"Failed to run Shake gesture: {e}")
+            logger.warning("Failed to run Shake gesture: %s", e)
 
     async def _look_straight(self):
         """Ask Furhat to attend to the user (neutral gaze)."""
@@ -270,9 +313,9 @@ class BehaviorGenerator:
             return
         try:
             await self.furhat.request_attend_user()
-            print("[Multimodal] Gesture: attend user")
+            logger.debug("[Multimodal] Gesture: attend user")
         except Exception as e:
-            print(f"Failed to attend to user: {e}")
+            logger.warning("Failed to attend to user: %s", e)
 
     async def _nod_head(self):
         """Trigger the Nod gesture with moderate intensity."""
@@ -284,14 +327,26 @@ class BehaviorGenerator:
                 intensity=0.7,
                 duration=0.6
             )
-            print("[Multimodal] Gesture: Nod")
+            logger.debug("[Multimodal] Gesture: Nod")
         except Exception as e:
-            print(f"Failed to run Nod gesture: {e}")
+            logger.warning("Failed to run Nod gesture: %s", e)
+
+    # Gesture descriptions to their handlers (plain functions, called with self)
+    _GESTURE_HANDLERS = MappingProxyType({
+        "slight head shake": _shake_head_slightly,
+        "look straight": _look_straight,
+        "nod head": _nod_head,
+    })
 
     def resolve_confidence(self, hint: Optional[str], word_count: int) -> str:
         """Resolve confidence using the hint or fall back to heuristics."""
-        if hint and hint.strip().lower() in self.CONFIDENCE_BEHAVIORS:
-            return hint.strip().lower()
+        if hint:
+            # Controller hints are usually already canonical; normalize only when they are not
+            if hint in self._VALID_CONF:
+                return hint
+            normalized = hint.strip().lower()
+            if normalized in self._VALID_CONF:
+                return normalized
         return self._estimate_confidence_from_words(word_count)
 
     def infer_confidence_from_text(self, text: str) -> str:
@@ -299,42 +354,13 @@ class BehaviorGenerator:
         pending = self.consume_pending_confidence()
         if pending:
             return pending
-        text_lower = text.lower()
-        if "i'm not entirely sure" in text_lower or "i'm not sure" in text_lower:
-            return "low"
-        elif "i'm confident" in text_lower or "i'm certain" in text_lower:
-            return "high"
-        elif "let me think" in text_lower or "i think" in text_lower:
-            return "medium"
-        return "medium"
-
-    def _load_thinking_script(self) -> List[Dict[str, Any]]:
-        """Load scripted thinking behaviors from config (with legacy fallback)."""
-        config = get_thinking_config()
-        behaviors = config.get("behaviors") or []
-        if isinstance(behaviors, list):
-            cleaned: List[Dict[str, Any]] = []
-            for entry in behaviors:
-                if isinstance(entry, dict):
-                    cleaned.append(entry)
-            return cleaned
-
-        # Legacy fallback to thinking_behaviors.json if config malformed
-        script_path = Path(__file__).resolve().parent.parent / "thinking_behaviors.json"
-        if not script_path.exists():
-            return []
-        try:
-            with script_path.open("r", encoding="utf-8") as fp:
-                data = json.load(fp)
-            if isinstance(data, list):
-                cleaned = []
-                for entry in data:
-                    if isinstance(entry, dict):
-                        cleaned.append(entry)
-                return cleaned
-        except Exception as e:
-            cprint(f"Failed to load thinking_behaviors.json: {e}")
-        return []
+        # One scan; a low cue anywhere outranks a high one, as before
+        level = "medium"
+        for match in _CONFIDENCE_CUES.finditer(text):
+            if match.lastgroup == "low":
+                return "low"
+            level = "high"
+        return level
 
     @staticmethod
     def _estimate_confidence_from_words(word_count: int) -> str:
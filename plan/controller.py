@@ -1,18 +1,48 @@
 """Controller module: decide confidence and whether visible thinking is needed."""
+import asyncio
+import copy
 import json
-import requests
-from typing import Any, Dict
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
 
 from utils.config import load_api_settings_from_files, OPENAI_SETTINGS
+from utils.http_client import get_session
+from utils.fast_json import dumps as json_dumps, loads as json_loads
 from plan.prompts import CONTROLLER_SYSTEM_PROMPT
 
+if TYPE_CHECKING:
+    import requests
+
+# Controller JSON with surrounding whitespace and an optional Markdown code fence (with or
+# without a json tag) removed; always matches, group 1 is the payload
+_FENCE_RE = re.compile(r"\s*(?:```(?:json)?)?\s*(.*?)\s*(?:```)?\s*", re.DOTALL | re.IGNORECASE)
+
+_SYSTEM_MESSAGE = {"role": "system", "content": CONTROLLER_SYSTEM_PROMPT}
+
+# Recent decisions keyed by (model, temperature, normalized question); LRU with a TTL,
+# shared across ControllerModel instances
+DECISION_CACHE_SIZE = 512
+DECISION_CACHE_TTL_SECONDS = 3600.0
+_DECISION_CACHE: "OrderedDict[Tuple[str, float, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_DECISION_CACHE_LOCK = threading.Lock()
+
+
+def _normalize_question(question: str) -> str:
+    """Normalize case and whitespace so trivially different questions share an entry."""
+    return " ".join(question.strip().lower().split())
+
 
 class ControllerModel:
     """Call the controller model to decide if thinking should be shown and gather hints."""
 
-    def __init__(self, question: str):
+    def __init__(self, question: str, session: Optional["requests.Session"] = None):
         load_api_settings_from_files()
         self.question = question
+        # Defaults to the process-wide pooled session shared with the streamers
+        self._session = session
         self.api_key = OPENAI_SETTINGS["api_key"]
         if not self.api_key:
             raise RuntimeError("Please configure a valid API key.")
@@ -22,6 +52,40 @@ class ControllerModel:
 
     def decide(self) -> Dict[str, Any]:
         """Determine whether thinking is needed and return metadata such as confidence."""
+        key = (self.model, round(float(self.temperature), 3), _normalize_question(self.question))
+        now = time.monotonic()
+        with _DECISION_CACHE_LOCK:
+            entry = _DECISION_CACHE.get(key)
+            if entry is not None and now - entry[0] > DECISION_CACHE_TTL_SECONDS:
+                del _DECISION_CACHE[key]
+                entry = None
+            if entry is not None:
+                _DECISION_CACHE.move_to_end(key)
+        if entry is not None:
+            # Callers may mutate the decision; hand out a private copy
+            return copy.deepcopy(entry[1])
+
+        decision = self._request_decision()
+        with _DECISION_CACHE_LOCK:
+            _DECISION_CACHE[key] = (time.monotonic(), decision)
+            _DECISION_CACHE.move_to_end(key)
+            if len(_DECISION_CACHE) > DECISION_CACHE_SIZE:
+                _DECISION_CACHE.popitem(last=False)
+        return copy.deepcopy(decision)
+
+    @staticmethod
+    def clear_cache():
+        """Forget all cached controller decisions."""
+        with _DECISION_CACHE_LOCK:
+            _DECISION_CACHE.clear()
+
+    async def decide_async(self) -> Dict[str, Any]:
+        """Run decide() in the default executor so the blocking HTTP call never stalls the loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.decide)
+
+    def _request_decision(self) -> Dict[str, Any]:
+        """Ask the controller model for a fresh decision."""
         url = f"{self.base_url}/v1/chat/completions"
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -31,25 +95,22 @@ class ControllerModel:
             "model": self.model,
             "temperature": self.temperature,
             "messages": [
-                {"role": "system", "content": CONTROLLER_SYSTEM_PROMPT},
+                _SYSTEM_MESSAGE,
                 {"role": "user", "content": self.question},
             ],
         }
-        resp = requests.post(url, headers=headers, json=payload, timeout=60)
+        session = self._session or get_session()
+        resp = session.post(url, headers=headers, data=json_dumps(payload), timeout=60)
         resp.raise_for_status()
-        content = resp.json()["choices"][0]["message"]["content"].strip()
+        content = json_loads(resp.content)["choices"][0]["message"]["content"]
         return self._parse_json(content)
 
     @staticmethod
     def _parse_json(text: str) -> Dict[str, Any]:
         """Parse the JSON payload returned by the controller model."""
-        candidate = text.strip()
-        if candidate.startswith("```"):
-            candidate = candidate.strip("`")
-            if candidate.lower().startswith("json"):
-                candidate = candidate[4:]
+        candidate = _FENCE_RE.fullmatch(text).group(1)
         try:
-            return json.loads(candidate)
+            return json_loads(candidate)
         except json.JSONDecodeError as err:
             raise RuntimeError(f"Controller response is not valid JSON: {candidate}") from err
 
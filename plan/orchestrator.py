@@ -1,6 +1,11 @@
 """Orchestrator: coordinate thinking and answering flows."""
 import asyncio
-from typing import Any, Dict, Optional, List
+import inspect
+import itertools
+import re
+from functools import lru_cache, partial
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Dict, Optional, List, Tuple
 
 from utils.streamer import ChatGPTSentenceStreamer
 from utils.print_utils import cprint
@@ -16,6 +21,9 @@ from plan.prompts import (
     build_reasoning_prompt,
 )
 
+if TYPE_CHECKING:
+    import requests
+
 # Visible thinking configuration
 THINKING_CONFIG = get_thinking_config()
 MAX_THINKING_CUES = int(THINKING_CONFIG.get("max_cues", 12) or 12)
@@ -27,23 +35,65 @@ MIN_THINKING_DURATION_SECONDS = float(
 DIRECT_RESPONSE_DELAY_SECONDS = float(
     THINKING_CONFIG.get("direct_response_delay_seconds", 0.0) or 0.0
 )  # Optional delay before speaking when no thinking is needed
-PERSIST_TRIALS = False  # Do not auto-record; rely on fixed my_trials.json
-
-CONFIDENCE_TONE_GUIDANCE = {
+PERSIST_TRIALS = False  # Default: do not auto-record; rely on fixed my_trials.json (--record-trials opts in)
+# Keep unrecorded answers in the (shared) TrialMemory so repeating the exact same question (after
+# normalization) in this session replays them; similar questions still go to the model
+REMEMBER_SESSION_ANSWERS = True
+# Speak answer clauses as they stream in, each utterance awaited to its end (wait=True) and
+# queued behind the previous one (abort=False); False, or a client whose request_speak_text
+# lacks those options, sends one utterance after the full answer
+STREAM_ANSWER_SPEECH = True
+# Clauses that queued up while the robot was speaking go out as one utterance (up to this many)
+SPEECH_BATCH_MAX_CLAUSES = 3
+
+# Orchestrator run ids, used to tag streamed answer speech
+_RUN_IDS = itertools.count(1)
+# A streamed cue needs at least one letter or digit (any script) to be worth saying
+_CUE_WORD = re.compile(r"\w")
+
+CONFIDENCE_TONE_GUIDANCE = MappingProxyType({
     "low": "Sound tentative and gentle, acknowledging uncertainty briefly.",
     "medium": "Use a thoughtful, balanced tone that shows measured confidence.",
     "high": "Respond with warm, natural confidence without sounding scripted.",
-}
+})
+# Reasoning prompt builders specialized per confidence tier (unknown tiers get no tone line)
+_REASONING_PROMPT_BUILDERS = MappingProxyType({
+    level: partial(build_reasoning_prompt, tone_instruction=tone)
+    for level, tone in CONFIDENCE_TONE_GUIDANCE.items()
+})
+
+
+@lru_cache(maxsize=8)
+def _resolve_answer_confidence(hint: Optional[str]) -> Tuple[str, str]:
+    """Return the confidence tier (unknown hints become medium) and its answer gesture."""
+    confidence = hint if hint in BehaviorGenerator.CONFIDENCE_BEHAVIORS else "medium"
+    return confidence, BehaviorGenerator.CONFIDENCE_BEHAVIORS[confidence][1]
+
+
+def _clean_str(value: Any) -> str:
+    """Strip a value as text, skipping str() for values that already are strings."""
+    return (value if type(value) is str else str(value)).strip()
 
 
 def normalize_thinking_notes(notes: Any) -> List[str]:
     """Normalize thinking notes so the list is safe to iterate."""
     if isinstance(notes, list):
-        return [str(item) for item in notes if item]
+        # One pass: stringify (only non-strings), strip, and drop empty entries
+        cleaned: List[str] = []
+        for item in notes:
+            if item:
+                text = _clean_str(item)
+                if text:
+                    cleaned.append(text)
+        return cleaned
     if isinstance(notes, str) and notes.strip():
         return [notes.strip()]
     return []
 
+
+_PLAN_TEXT_FIELDS = ("gesture", "expression", "led", "reason")
+
+
 def normalize_behavior_plan(plan: Any) -> List[Dict[str, str]]:
     """Normalize controller-provided behavior plan entries."""
     normalized: List[Dict[str, str]] = []
@@ -51,10 +101,10 @@ def normalize_behavior_plan(plan: Any) -> List[Dict[str, str]]:
         for entry in plan:
             if not isinstance(entry, dict):
                 continue
-            gesture = str(entry.get("gesture", "")).strip()
-            expression = str(entry.get("expression", "")).strip()
-            led = str(entry.get("led", "")).strip()
-            reason = str(entry.get("reason", "")).strip()
+            get = entry.get
+            gesture, expression, led, reason = (
+                _clean_str(get(field, "")) for field in _PLAN_TEXT_FIELDS
+            )
             look_at = None
             target = entry.get("look_at") or entry.get("location") or entry.get("target")
             if isinstance(target, dict):
@@ -81,11 +131,19 @@ def normalize_behavior_plan(plan: Any) -> List[Dict[str, str]]:
     return normalized
 
 
+@lru_cache(maxsize=None)
+def _speak_waits_for_end(client_type: type) -> bool:
+    """Return True when the client's request_speak_text takes the wait/abort options."""
+    try:
+        params = inspect.signature(client_type.request_speak_text).parameters
+    except (AttributeError, TypeError, ValueError):
+        return False
+    return "wait" in params and "abort" in params
+
+
 def _is_meaningful_thinking_cue(text: str) -> bool:
     """Filter out tokens that contain only punctuation or whitespace."""
-    stripped = text.strip()
-    stripped = stripped.strip(".!?…")
-    return bool(stripped)
+    return _CUE_WORD.search(text) is not None
 
 
 class Orchestrator:
@@ -100,26 +158,43 @@ class Orchestrator:
         replay_only: bool = False,
         skip_replay_thinking: bool = False,
         use_trial_memory: bool = True,
+        decision_future: Optional["asyncio.Future"] = None,
+        persist_trials: bool = PERSIST_TRIALS,
+        http_session: Optional["requests.Session"] = None,
     ):
         self.question = question
-        self.controller = ControllerModel(question)
+        # One pooled session for the controller and both streams (None: the process-wide one)
+        self.http_session = http_session
+        self.controller = ControllerModel(question, session=http_session)
         self.behavior_generator = behavior_generator or BehaviorGenerator()
         self.furhat_client = furhat_client  # Furhat client used to send speech
         self.trial_memory = trial_memory or TrialMemory()
         self.replay_only = replay_only
         self.skip_replay_thinking = skip_replay_thinking or replay_only
         self.use_trial_memory = use_trial_memory
+        # Write model-generated runs back so later sessions replay them without model calls
+        self.persist_trials = persist_trials
+        # Controller decision already requested speculatively (e.g. from stable ASR partials)
+        self.decision_future = decision_future
         self.decision: Dict[str, Any] = {}
         self.current_answer_text = ""
         self.thinking_cues_emitted: List[str] = []
         self.resolved_confidence: Optional[str] = None
-        self.thinking_window_done = asyncio.Event()
+        # One-shot signal per run(), created there so it belongs to the running loop
+        self.thinking_window_done: Optional["asyncio.Future"] = None
+        # True once the answer was spoken in several utterances (the caller records the turn)
+        self.answer_streamed = False
+        # Tags this run's streamed speech so the bridge can tell its events apart
+        self.run_id = next(_RUN_IDS)
+        # Streamed answer playback still running after run() returns (the caller owns it)
+        self.speech_task: Optional["asyncio.Task"] = None
 
     async def run(self):
         """Execute the full pipeline."""
         self.thinking_cues_emitted = []
         self.resolved_confidence = None
-        self.thinking_window_done.clear()
+        # A fresh future per turn: a waiter left over from an earlier run never sees this one
+        self.thinking_window_done = asyncio.get_running_loop().create_future()
         cprint(f"User: {self.question}")
 
         cached = self.trial_memory.get(self.question) if self.use_trial_memory else None
@@ -130,55 +205,80 @@ class Orchestrator:
         if self.replay_only and not cached:
             cprint("Replay-only mode: no stored answer found, falling back to model")
 
-        self.decision = self.controller.decide()
+        self.decision = await self._resolve_decision()
         need_thinking = bool(self.decision.get("need_thinking", False))
         confidence_hint = self.decision.get("confidence")
 
         if not need_thinking:
-            self.thinking_window_done.set()
+            self._end_thinking_window()
             await self._respond_directly(confidence_hint)
             self._persist_trial_record()
             return
 
         thinking_notes = normalize_thinking_notes(self.decision.get("thinking_notes"))
-        reasoning_hint = self.decision.get("reasoning_hint", "")
-        behavior_plan = normalize_behavior_plan(self.decision.get("thinking_behavior_plan"))
-        tone_instruction = CONFIDENCE_TONE_GUIDANCE.get(confidence_hint, "")
-        self.behavior_generator.set_thinking_mode(True)
-
+        raw_plan = self.decision.get("thinking_behavior_plan")
+        behavior_plan = normalize_behavior_plan(raw_plan) if raw_plan else []
         thinking_model = ChatGPTSentenceStreamer(
-            user_content=build_thinking_prompt(self.question, thinking_notes),
+            user_content=build_thinking_prompt(self.question, tuple(thinking_notes)),
             model=OPENAI_SETTINGS["thinking_model"],
             temperature=OPENAI_SETTINGS["thinking_temperature"],
             system_prompt=THINKING_SYSTEM_PROMPT,
+            session=self.http_session,
         )
-        reasoning_model = ChatGPTSentenceStreamer(
-            user_content=build_reasoning_prompt(
-                self.question,
-                reasoning_hint,
-                tone_instruction=tone_instruction,
-            ),
-            model=OPENAI_SETTINGS["reasoning_model"],
-            temperature=OPENAI_SETTINGS["reasoning_temperature"],
-            system_prompt=REASONING_SYSTEM_PROMPT,
+        reasoning_model = self._create_reasoning_model(
+            self.decision.get("reasoning_hint", ""), confidence_hint
         )
 
+        self.behavior_generator.set_thinking_mode(True)
         thinking_task = asyncio.create_task(
             self._relay_thinking(thinking_model, thinking_notes, behavior_plan)
         )
         try:
             await self._relay_answer(reasoning_model, confidence_hint)
+            # The window may outlast a short answer; let it run out without raising here
+            await asyncio.wait((thinking_task,))
         finally:
-            await thinking_task
+            # No-op when thinking already finished; otherwise the answer failed or the turn
+            # was cancelled, so end the thinking window (and its stream) now
+            thinking_task.cancel()
+            await asyncio.gather(thinking_task, return_exceptions=True)
+        if not thinking_task.cancelled() and thinking_task.exception() is not None:
+            # Visible thinking is best-effort; the answer has already been given
+            cprint(f"[Thinking] Visible thinking failed: {thinking_task.exception()}")
         self._persist_trial_record()
 
+    def _create_reasoning_model(
+        self, reasoning_hint: str = "", confidence_hint: Optional[str] = None
+    ) -> ChatGPTSentenceStreamer:
+        """Build the answer streamer for the current question."""
+        build_prompt = _REASONING_PROMPT_BUILDERS.get(confidence_hint, build_reasoning_prompt)
+        return ChatGPTSentenceStreamer(
+            user_content=build_prompt(self.question, reasoning_hint),
+            model=OPENAI_SETTINGS["reasoning_model"],
+            temperature=OPENAI_SETTINGS["reasoning_temperature"],
+            system_prompt=REASONING_SYSTEM_PROMPT,
+            session=self.http_session,
+        )
+
+    async def _resolve_decision(self) -> Dict[str, Any]:
+        """Use the speculative controller decision when available, else ask the controller."""
+        if self.decision_future is not None:
+            try:
+                return await self.decision_future
+            except Exception as err:
+                cprint(f"[Controller] Speculative decision failed ({err}); asking again")
+        return await self.controller.decide_async()
+
+    @staticmethod
+    def _follow_up_line(user_has_more: Optional[bool] = None) -> str:
+        """Return the guidance line that prompts the next question or closes."""
+        if user_has_more is False:
+            return "Thanks for chatting. That's all for today."
+        return "Do you have another question?"
+
     def _append_follow_up(self, answer: str, user_has_more: Optional[bool] = None) -> str:
         """Add a short guidance line to prompt the next question or close."""
-        if user_has_more is False:
-            tail = "Thanks for chatting. That's all for today."
-        else:
-            tail = "Do you have another question?"
-        return f"{answer} {tail}".strip()
+        return f"{answer} {self._follow_up_line(user_has_more)}".strip()
 
     async def _respond_no_record(self):
         """Respond when replay-only mode has no stored answer."""
@@ -189,7 +289,7 @@ class Orchestrator:
         if self.furhat_client:
             await self.furhat_client.request_speak_text(full_answer)
         self.current_answer_text = full_answer
-        self.thinking_window_done.set()
+        self._end_thinking_window()
 
     async def _respond_directly(self, confidence_hint: Optional[str]):
         """Handle situations where no thinking window is required."""
@@ -200,8 +300,7 @@ class Orchestrator:
         if DIRECT_RESPONSE_DELAY_SECONDS > 0:
             await asyncio.sleep(DIRECT_RESPONSE_DELAY_SECONDS)
         
-        confidence = confidence_hint if confidence_hint in self.behavior_generator.CONFIDENCE_BEHAVIORS else "medium"
-        _, gesture_description = self.behavior_generator.get_confidence_behavior(confidence)
+        confidence, gesture_description = _resolve_answer_confidence(confidence_hint)
         self.behavior_generator.set_pending_confidence(confidence)
         full_answer = self._append_follow_up(answer.strip())
         self.resolved_confidence = confidence
@@ -237,22 +336,23 @@ class Orchestrator:
                     index, instruction=instruction
                 )
 
+        cues = thinking_model.stream()
+        cancelled = False
         try:
+            # Read the clock once per guard; the same reading also times the pause
             for note in thinking_notes:
-                if loop.time() >= deadline or emitted >= MAX_THINKING_CUES:
+                if emitted >= MAX_THINKING_CUES or loop.time() >= deadline:
                     break
-                cleaned = note.strip()
-                if not cleaned:
-                    continue
-                self.thinking_cues_emitted.append(cleaned)
-                await emit_line(cleaned, emitted)
+                self.thinking_cues_emitted.append(note)
+                await emit_line(note, emitted)
                 emitted += 1
-                if loop.time() >= deadline or emitted >= MAX_THINKING_CUES:
+                now = loop.time()
+                if emitted >= MAX_THINKING_CUES or now >= deadline:
                     break
-                await asyncio.sleep(THINKING_PAUSE_SECONDS)
+                await self._pace_cue(start_time, emitted, now)
 
-            async for cue in thinking_model.stream():
-                if loop.time() >= deadline or emitted >= MAX_THINKING_CUES:
+            async for cue in cues:
+                if emitted >= MAX_THINKING_CUES or loop.time() >= deadline:
                     break
                 if not _is_meaningful_thinking_cue(cue):
                     continue
@@ -260,17 +360,35 @@ class Orchestrator:
                 self.thinking_cues_emitted.append(cue)
                 await emit_line(cue, emitted)
                 emitted += 1
-                if loop.time() >= deadline or emitted >= MAX_THINKING_CUES:
+                now = loop.time()
+                if emitted >= MAX_THINKING_CUES or now >= deadline:
                     break
-                await asyncio.sleep(THINKING_PAUSE_SECONDS)
+                await self._pace_cue(start_time, emitted, now)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
         finally:
-            # Enforce a minimum thinking duration
+            # Stop consuming the thinking stream as soon as the window closes
+            await cues.aclose()
+            # Enforce a minimum thinking duration unless the turn was cancelled
             min_duration = min(MIN_THINKING_DURATION_SECONDS, THINKING_DURATION_SECONDS)
             elapsed = loop.time() - start_time
-            if elapsed < min_duration:
+            if not cancelled and elapsed < min_duration:
                 await asyncio.sleep(min_duration - elapsed)
             self.behavior_generator.set_thinking_mode(False)
-            self.thinking_window_done.set()
+            self._end_thinking_window()
+
+    def _end_thinking_window(self):
+        """Release the answer; later calls (or a waiter that was cancelled) are ignored."""
+        if not self.thinking_window_done.done():
+            self.thinking_window_done.set_result(None)
+
+    @staticmethod
+    async def _pace_cue(start_time: float, emitted: int, now: float):
+        """Wait until the next cue's slot on a fixed cadence (emit time counts toward the pause)."""
+        delay = start_time + emitted * THINKING_PAUSE_SECONDS - now
+        if delay > 0:
+            await asyncio.sleep(delay)
 
     async def _relay_answer(
         self,
@@ -281,37 +399,88 @@ class Orchestrator:
         gesture_description = ""
         first_clause = True
         full_answer_parts = []
+        clauses = reasoning_model.stream()
+
+        speech_queue: Optional[asyncio.Queue] = None
+        speech_task: Optional[asyncio.Task] = None
+        if (
+            self.furhat_client
+            and STREAM_ANSWER_SPEECH
+            and _speak_waits_for_end(type(self.furhat_client))
+        ):
+            speech_queue = asyncio.Queue()
+            speech_task = asyncio.create_task(self._speech_worker(speech_queue))
+
+        try:
+            async for clause in clauses:
+                if first_clause:
+                    await self.thinking_window_done
+                    confidence_level = self.behavior_generator.resolve_confidence(
+                        confidence_hint, reasoning_model.word_count
+                    )
+                    self.resolved_confidence = confidence_level
+                    _, gesture_description = self.behavior_generator.get_confidence_behavior(confidence_level)
+                    self.behavior_generator.set_pending_confidence(confidence_level)
+                    cprint(f"Robot switches to answer mode (confidence={confidence_level}, gesture={gesture_description})")
+
+                    # Gestures are dispatched by the bridge when the first utterance starts
+                    first_clause = False
+
+                cprint(f"Robot: {clause}")
+                full_answer_parts.append(clause)
+                if speech_queue is not None:
+                    # Start speaking while the rest of the answer is still streaming
+                    speech_queue.put_nowait(clause)
+
+            if full_answer_parts:
+                full_answer = self._append_follow_up(" ".join(full_answer_parts).strip())
+                self.current_answer_text = full_answer
+                if speech_queue is not None:
+                    self.answer_streamed = True
+                    speech_queue.put_nowait(self._follow_up_line())
+                elif self.furhat_client:
+                    # Send a single combined utterance to Furhat
+                    await self.furhat_client.request_speak_text(full_answer)
+        except BaseException:
+            if speech_task is not None:
+                speech_task.cancel()
+            # Stop the answer stream's producer thread and HTTP request now, not at GC time
+            await clauses.aclose()
+            if speech_task is not None:
+                await asyncio.gather(speech_task, return_exceptions=True)
+            raise
+
+        if speech_task is not None:
+            speech_queue.put_nowait(None)
+            # Like a single fire-and-forget utterance, the rest of the playback is not part of
+            # this (cancellable) run: a barge-in now no longer cuts the answer off
+            self.speech_task = speech_task
 
-        # Collect all sentences first
-        async for clause in reasoning_model.stream():
-            if first_clause:
-                await self.thinking_window_done.wait()
-                confidence_level = self.behavior_generator.resolve_confidence(
-                    confidence_hint, reasoning_model.word_count
-                )
-                self.resolved_confidence = confidence_level
-                _, gesture_description = self.behavior_generator.get_confidence_behavior(confidence_level)
-                self.behavior_generator.set_pending_confidence(confidence_level)
-                cprint(f"Robot switches to answer mode (confidence={confidence_level}, gesture={gesture_description})")
-                
-                # Gestures are dispatched by the bridge when speech starts
-                first_clause = False
-
-            cprint(f"Robot: {clause}")
-            full_answer_parts.append(clause)
-        
-        # Send a single combined utterance to Furhat to avoid repeated triggers
-        if full_answer_parts:
-            full_answer = self._append_follow_up(" ".join(full_answer_parts).strip())
-            self.current_answer_text = full_answer
-            
-            # Only send once at the end
-            if self.furhat_client:
-                await self.furhat_client.request_speak_text(full_answer)
-        
         if gesture_description:
             cprint(f"Robot (non-verbal gesture): {gesture_description}")
 
+    async def _speech_worker(self, queue: asyncio.Queue):
+        """Speak queued answer chunks in order until the None sentinel arrives."""
+        done = False
+        while not done:
+            text = await queue.get()
+            if text is None:
+                break
+            # Only merge what is already waiting, so the first clause is never delayed
+            batch = [text]
+            while len(batch) < SPEECH_BATCH_MAX_CLAUSES and not queue.empty():
+                text = queue.get_nowait()
+                if text is None:
+                    done = True
+                    break
+                batch.append(text)
+            utterance = " ".join(batch)
+            # Tagged before speaking, so the bridge leaves this chunk's speech events (which may
+            # arrive after this run ends) to the caller that records the whole streamed turn
+            self.behavior_generator.mark_answer_chunk(utterance, self.run_id)
+            # The client defaults to fire-and-forget; batching relies on waiting for speak end
+            await self.furhat_client.request_speak_text(utterance, abort=False, wait=True)
+
     async def _replay_cached_trial(self, record: Dict[str, Any], skip_thinking: bool = False):
         """Replay a stored trial without calling models again."""
         self.decision = record.get("decision") if isinstance(record.get("decision"), dict) else {}
@@ -329,7 +498,8 @@ class Orchestrator:
             if isinstance(raw_conf, str) and raw_conf.strip():
                 final_confidence = raw_conf.strip()
 
-        behavior_plan = normalize_behavior_plan(self.decision.get("thinking_behavior_plan"))
+        raw_plan = self.decision.get("thinking_behavior_plan")
+        behavior_plan = normalize_behavior_plan(raw_plan) if raw_plan else []
         need_thinking = bool(self.decision.get("need_thinking", bool(thinking_cues))) and not skip_thinking
 
         if need_thinking and thinking_cues:
@@ -342,22 +512,21 @@ class Orchestrator:
                     instruction = behavior_plan[idx % len(behavior_plan)] if behavior_plan else None
                     await self.behavior_generator.perform_thinking_behavior(idx, instruction=instruction)
                 if idx < len(thinking_cues) - 1:
-                    await asyncio.sleep(THINKING_PAUSE_SECONDS)
+                    await self._pace_cue(start_time, idx + 1, loop.time())
 
             min_duration = min(MIN_THINKING_DURATION_SECONDS, THINKING_DURATION_SECONDS)
             elapsed = loop.time() - start_time
             if elapsed < min_duration:
                 await asyncio.sleep(min_duration - elapsed)
             self.behavior_generator.set_thinking_mode(False)
-            self.thinking_window_done.set()
+            self._end_thinking_window()
         else:
             if DIRECT_RESPONSE_DELAY_SECONDS > 0:
                 await asyncio.sleep(DIRECT_RESPONSE_DELAY_SECONDS)
-            self.thinking_window_done.set()
+            self._end_thinking_window()
 
-        confidence = final_confidence if final_confidence in self.behavior_generator.CONFIDENCE_BEHAVIORS else "medium"
+        confidence, gesture_description = _resolve_answer_confidence(final_confidence)
         self.resolved_confidence = confidence
-        _, gesture_description = self.behavior_generator.get_confidence_behavior(confidence)
         self.behavior_generator.set_pending_confidence(confidence)
         cprint(f"Robot switches to answer mode (confidence={confidence}, gesture={gesture_description})")
         cprint(f"Robot: {answer}")
@@ -369,9 +538,9 @@ class Orchestrator:
 
     def _persist_trial_record(self):
         """Save the latest run so repeated questions reuse the same flow."""
-        if not PERSIST_TRIALS or not self.use_trial_memory:
+        if not self.use_trial_memory or not self.current_answer_text:
             return
-        if not self.current_answer_text:
+        if not self.persist_trials and not REMEMBER_SESSION_ANSWERS:
             return
         record = {
             "question": self.question,
@@ -381,6 +550,10 @@ class Orchestrator:
             "final_confidence": self.resolved_confidence,
         }
         try:
-            self.trial_memory.save_record(record)
+            if not self.persist_trials:
+                self.trial_memory.remember(record)
+                return
+            # The file write runs on TrialMemory's writer thread so the loop is not blocked
+            self.trial_memory.save_record_in_background(record)
         except Exception as err:
             cprint(f"[TrialMemory] Failed to persist record: {err}")
@@ -1,4 +1,5 @@
 """Prompt definition module."""
+from functools import lru_cache
 
 # Controller prompt
 CONTROLLER_SYSTEM_PROMPT = """You are a Furhat robot orchestrator. Output STRICT JSON only.
@@ -40,23 +41,35 @@ THINKING_SYSTEM_PROMPT = (
 )
 
 
-def build_thinking_prompt(question: str, notes: list) -> str:
-    """Build the thinking prompt fed to the visible-thinking model."""
-    filtered = [note for note in notes if note]
-    joined = "\n".join(f"- {note}" for note in filtered) or "- Organizing possible answers"
-    return (
-        f"User question: {question}\n"
-        f"Preliminary thoughts:\n{joined}\n"
-        "Follow the system prompt to generate visible thinking phrases."
-    )
+# Fixed fragments of the per-turn user prompts
+_QUESTION_PREFIX = "User question: "
+# Instruction first, question and notes last, so consecutive turns share the longest prefix
+_THINKING_PREFIX = "Follow the system prompt to generate visible thinking phrases.\n"
+_THINKING_NOTES_HEADER = "\nPreliminary thoughts:\n"
+_THINKING_DEFAULT_NOTES = "- Organizing possible answers"
+# Same layout for answers: fixed instruction, then the per-tier tone, then question and hint
+_REASONING_PREFIX = (
+    "Please summarize the solution in 2-3 sentences, do not output chain-of-thought reasoning.\n"
+)
+_REASONING_TONE_PREFIX = "Adopt this tone: "
+_REASONING_HINT_PREFIX = "\nPreliminary hint to consider: "
+
+
+# Builders are pure, so identical turns (same question, notes, hint) reuse the string
+@lru_cache(maxsize=512)
+def build_thinking_prompt(question: str, notes: tuple) -> str:
+    """Build the thinking prompt fed to the visible-thinking model (notes already normalized)."""
+    joined = "\n".join(f"- {note}" for note in notes) or _THINKING_DEFAULT_NOTES
+    return "".join((_THINKING_PREFIX, _QUESTION_PREFIX, question, _THINKING_NOTES_HEADER, joined))
 
 
+@lru_cache(maxsize=512)
 def build_reasoning_prompt(question: str, hint: str, tone_instruction: str = "") -> str:
     """Build the reasoning prompt fed to the answer model."""
-    hint_part = f"\nPreliminary hint to consider: {hint}" if hint else ""
-    tone_part = f"\nAdopt this tone: {tone_instruction}" if tone_instruction else ""
-    return (
-        f"User question: {question}"
-        f"{hint_part}{tone_part}\n"
-        "Please summarize the solution in 2-3 sentences, do not output chain-of-thought reasoning."
-    )
+    parts = [_REASONING_PREFIX]
+    if tone_instruction:
+        parts += (_REASONING_TONE_PREFIX, tone_instruction, "\n")
+    parts += (_QUESTION_PREFIX, question)
+    if hint:
+        parts += (_REASONING_HINT_PREFIX, hint)
+    return "".join(parts)
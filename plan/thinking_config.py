@@ -1,7 +1,8 @@
 """Thinking configuration loader (durations, pause, cues, scripted behaviors)."""
 import json
+import threading
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from utils.print_utils import cprint
 
 
@@ -14,18 +15,21 @@ DEFAULT_CONFIG: Dict[str, Any] = {
     "behaviors": [],
 }
 
-CONFIG_PATH = Path(__file__).resolve().parent.parent / "thinking_config.json"
-LEGACY_BEHAVIORS_PATH = Path(__file__).resolve().parent.parent / "thinking_behaviors.json"
+ROOT_DIR = Path(__file__).resolve().parent.parent
+CONFIG_PATH = ROOT_DIR / "thinking_config.json"
+LEGACY_BEHAVIORS_PATH = ROOT_DIR / "thinking_behaviors.json"
 
-_CACHED_CONFIG: Dict[str, Any] = {}
+_CACHED_CONFIG: Optional[Dict[str, Any]] = None
+_CONFIG_LOCK = threading.Lock()
 
 
 def _safe_load_json(path: Path) -> Any:
-    if not path.exists():
-        return None
+    # Opening directly saves a separate exists() stat; a missing file is the common case
     try:
         with path.open("r", encoding="utf-8") as fp:
             return json.load(fp)
+    except FileNotFoundError:
+        return None
     except Exception as err:
         cprint(f"[ThinkingConfig] Failed to load {path.name}: {err}")
         return None
@@ -42,11 +46,19 @@ def _merge_config(base: Dict[str, Any], loaded: Dict[str, Any]) -> Dict[str, Any
 
 
 def get_thinking_config() -> Dict[str, Any]:
-    """Load thinking config once (durations, pause, cues, behaviors)."""
+    """Load thinking config once (durations, pause, cues, behaviors); thread-safe."""
     global _CACHED_CONFIG
-    if _CACHED_CONFIG:
+    config = _CACHED_CONFIG
+    if config is not None:
+        return config
+    with _CONFIG_LOCK:
+        if _CACHED_CONFIG is None:
+            _CACHED_CONFIG = _build_config()
         return _CACHED_CONFIG
 
+
+def _build_config() -> Dict[str, Any]:
+    """Merge thinking_config.json (and legacy behaviors) over the defaults."""
     config = dict(DEFAULT_CONFIG)
 
     # Load main config file if present
@@ -68,6 +80,4 @@ def get_thinking_config() -> Dict[str, Any]:
         config["behaviors"] = cleaned
     else:
         config["behaviors"] = []
-
-    _CACHED_CONFIG = config
-    return _CACHED_CONFIG
+    return config
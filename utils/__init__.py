@@ -1,7 +1,14 @@
 """Utility helpers."""
 from .config import load_api_settings_from_files, OPENAI_SETTINGS
-from .streamer import ChatGPTSentenceStreamer
 from .print_utils import cprint
 
 __all__ = ['load_api_settings_from_files', 'OPENAI_SETTINGS', 'ChatGPTSentenceStreamer', 'cprint']
 
+
+def __getattr__(name):
+    """Import the streamer on first access so `import utils` skips the HTTP stack."""
+    if name == "ChatGPTSentenceStreamer":
+        from .streamer import ChatGPTSentenceStreamer
+        return ChatGPTSentenceStreamer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
@@ -1,13 +1,18 @@
 """Configuration loader."""
 import json
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict
-from dotenv import load_dotenv
+from utils.fast_json import loads as json_loads
 
 CONFIG_JSON_PATH = Path("config.json")
 API_KEY_TXT_PATH = Path("api_key.txt")
-SETTINGS_LOADED = False
+ENV_PATH = Path(".env")
+
+# Project root first, then its parent (resolved once at import)
+ROOT_DIR = Path(__file__).resolve().parent.parent
+_SEARCH_DIRS = (ROOT_DIR, ROOT_DIR.parent)
 
 # ==== Base configuration (overridden by config files) ====
 OPENAI_SETTINGS: Dict[str, Any] = {
@@ -22,28 +27,39 @@ OPENAI_SETTINGS: Dict[str, Any] = {
 }
 
 
-def load_api_settings_from_files():
-    """Load API settings from config.json, api_key.txt, or .env files."""
-    global SETTINGS_LOADED
-    if SETTINGS_LOADED:
-        return
+_CONFIG_FILE_NAMES = frozenset((CONFIG_JSON_PATH.name, API_KEY_TXT_PATH.name, ENV_PATH.name))
+
+
+def _find_config_files() -> Dict[str, Path]:
+    """Map each config file name to its first location, with one directory scan per search dir."""
+    found: Dict[str, Path] = {}
+    for directory in _SEARCH_DIRS:
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name in _CONFIG_FILE_NAMES and entry.name not in found and entry.is_file():
+                        found[entry.name] = Path(entry.path)
+        except OSError:
+            continue
+        if len(found) == len(_CONFIG_FILE_NAMES):
+            break
+    return found
 
+
+@lru_cache(maxsize=None)
+def load_api_settings_from_files():
+    """Load API settings from config.json, api_key.txt, or .env files (once per process)."""
     api_key = ""
     config_data: Dict[str, Any] = {}
+    config_files = _find_config_files()
 
-    # Prefer config.json from project root
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    # Look for config.json in current and parent directories
-    config_path = Path(script_dir).parent / CONFIG_JSON_PATH
-    if not config_path.exists():
-        config_path = Path(script_dir).parent.parent / CONFIG_JSON_PATH
-
-    if config_path.exists():
+    # Prefer config.json from project root, then its parent directory
+    config_path = config_files.get(CONFIG_JSON_PATH.name)
+    if config_path is not None:
         try:
-            with config_path.open("r", encoding="utf-8") as file:
-                loaded = json.load(file)
-                if isinstance(loaded, dict):
-                    config_data = loaded
+            loaded = json_loads(config_path.read_bytes())
+            if isinstance(loaded, dict):
+                config_data = loaded
         except json.JSONDecodeError as err:
             print(f"Warning: failed to parse config.json: {err}")
 
@@ -64,10 +80,8 @@ def load_api_settings_from_files():
 
     # Fall back to api_key.txt if needed
     if not api_key:
-        api_key_path = Path(script_dir).parent / API_KEY_TXT_PATH
-        if not api_key_path.exists():
-            api_key_path = Path(script_dir).parent.parent / API_KEY_TXT_PATH
-        if api_key_path.exists():
+        api_key_path = config_files.get(API_KEY_TXT_PATH.name)
+        if api_key_path is not None:
             with api_key_path.open("r", encoding="utf-8") as file:
                 for line in file:
                     line = line.strip()
@@ -77,17 +91,19 @@ def load_api_settings_from_files():
 
     # Finally, try .env files
     if not api_key:
-        env_path = os.path.join(Path(script_dir).parent, '.env')
-        if not os.path.exists(env_path):
-            env_path = os.path.join(Path(script_dir).parent.parent, '.env')
-        load_dotenv(env_path, override=True)
+        # Imported here: most setups find the key in config.json or api_key.txt first
+        from dotenv import load_dotenv
+
+        env_path = config_files.get(ENV_PATH.name)
+        if env_path is not None:
+            load_dotenv(env_path, override=True)
         api_key = os.environ.get("OPENAI_API_KEY", "").strip()
 
+    # Raising skips the cache, so the next caller retries the lookup
     if not api_key:
         raise RuntimeError(
             "API key not found. Please populate config.json (api_key), api_key.txt, or .env (OPENAI_API_KEY)."
         )
 
     OPENAI_SETTINGS["api_key"] = api_key
-    SETTINGS_LOADED = True
 
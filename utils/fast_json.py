@@ -0,0 +1,30 @@
+"""JSON helpers that use orjson when it is installed."""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional; the standard library parser produces the same objects
+    orjson = None
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON from bytes or str (orjson.JSONDecodeError subclasses json.JSONDecodeError)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize obj to compact UTF-8 JSON bytes, ready to send as a request body."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_pretty(obj: Any) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes indented by two spaces, for files people edit."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
@@ -0,0 +1,48 @@
+"""Shared HTTP session so controller and streaming calls reuse pooled connections."""
+import atexit
+import threading
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import requests
+
+# One turn issues controller, thinking and reasoning calls to the same host
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 8
+
+_SESSION: Optional["requests.Session"] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def get_session() -> "requests.Session":
+    """Return the process-wide session, creating it on first use (thread-safe)."""
+    global _SESSION
+    session = _SESSION
+    if session is not None:
+        return session
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            # Deferred so importing the streamer/controller does not load the HTTP stack
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=POOL_CONNECTIONS,
+                pool_maxsize=POOL_MAXSIZE,
+                max_retries=0,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _SESSION = session
+            atexit.register(close_session)
+        return _SESSION
+
+
+def close_session():
+    """Close pooled connections; a later get_session() starts a fresh session."""
+    global _SESSION
+    with _SESSION_LOCK:
+        session, _SESSION = _SESSION, None
+    if session is not None:
+        session.close()
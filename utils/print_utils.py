@@ -1,28 +1,65 @@
 """Printing helpers that handle UTF-8 output safely."""
+import atexit
+import codecs
+import queue
 import sys
-import io
-from datetime import datetime
+import threading
+import time
 from pathlib import Path
+from typing import Optional
+
+
+def _is_utf8(stream) -> bool:
+    """Return True when the stream already encodes UTF-8."""
+    try:
+        return codecs.lookup(stream.encoding or "").name == "utf-8"
+    except (AttributeError, LookupError, TypeError):
+        return False
+
+
+def _stdout_is_safe() -> bool:
+    """Return True when stdout cannot raise UnicodeEncodeError."""
+    return _is_utf8(sys.stdout) and getattr(sys.stdout, "errors", "strict") != "strict"
+
+
+def _ensure_utf8_console():
+    """Make the console emit UTF-8 text."""
+    # Reconfigure in place and only when needed, so a stream swapped in by a test runner or
+    # debugger is never replaced by a new wrapper
+    for stream in (sys.stdout, sys.stderr):
+        if hasattr(stream, "reconfigure") and not _is_utf8(stream):
+            try:
+                stream.reconfigure(encoding="utf-8")
+            except Exception:
+                pass
 
-# Ensure the console can emit UTF-8 text
-try:
-    if hasattr(sys.stdout, "reconfigure"):
-        sys.stdout.reconfigure(encoding="utf-8")
-        sys.stderr.reconfigure(encoding="utf-8")
-    else:
-        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
-        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding="utf-8")
-except Exception:
-    pass
+
+_ensure_utf8_console()
+
+
+# Probed once at import so cprint can skip the encoding fallback on every call
+_SAFE_STDOUT = _stdout_is_safe()
 
 
 LOG_FILE_PATH = Path(__file__).resolve().parent.parent / "terminal.txt"
+# Most lines the writer thread joins into a single write() call
+LOG_BATCH_SIZE = 64
+# How long interpreter exit waits for queued lines to reach the file
+LOG_DRAIN_TIMEOUT_SECONDS = 2.0
 
+# (time.time(), text) pairs; SimpleQueue.put never blocks the printing thread
+_LOG_QUEUE: "queue.SimpleQueue" = queue.SimpleQueue()
+_LOG_STOP = object()
+_LOG_THREAD: Optional[threading.Thread] = None
+_LOG_THREAD_LOCK = threading.Lock()
+# Set once the exit drain has stopped the writer; later lines are written synchronously
+_LOG_CLOSED = False
 
-def _log_to_file(text: str):
-    """Append timestamped text to terminal log file."""
+
+def _write_log_line(logged_at: float, text: str):
+    """Append one timestamped line directly (used once the writer thread has stopped)."""
     try:
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(logged_at))
         with LOG_FILE_PATH.open("a", encoding="utf-8") as fp:
             fp.write(f"[{timestamp}] {text}\n")
     except Exception:
@@ -30,18 +67,109 @@ def _log_to_file(text: str):
         pass
 
 
+def _log_worker():
+    """Append queued lines to the log file in batches, keeping the file open."""
+    fp = None
+    stopping = False
+    # Lines arrive in bursts within the same second; format each second only once
+    stamp_second = -1
+    timestamp = ""
+    while not stopping:
+        item = _LOG_QUEUE.get()
+        batch = []
+        while True:
+            if item is _LOG_STOP:
+                stopping = True
+                break
+            logged_at, text = item
+            second = int(logged_at)
+            if second != stamp_second:
+                stamp_second = second
+                timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second))
+            batch.append(f"[{timestamp}] {text}\n")
+            if len(batch) >= LOG_BATCH_SIZE:
+                break
+            try:
+                item = _LOG_QUEUE.get_nowait()
+            except queue.Empty:
+                break
+        if not batch:
+            continue
+        try:
+            if fp is None:
+                fp = LOG_FILE_PATH.open("a", encoding="utf-8")
+            fp.write("".join(batch))
+            fp.flush()
+        except Exception:
+            # Logging must never break console output
+            pass
+    if fp is not None:
+        fp.close()
+
+
+def _drain_log():
+    """Stop the writer once everything queued so far has been written."""
+    global _LOG_THREAD, _LOG_CLOSED
+    with _LOG_THREAD_LOCK:
+        thread = _LOG_THREAD
+        # From here on _log_to_file writes synchronously instead of queueing
+        _LOG_THREAD = None
+        _LOG_CLOSED = True
+    if thread is not None and thread.is_alive():
+        _LOG_QUEUE.put(_LOG_STOP)
+        thread.join(LOG_DRAIN_TIMEOUT_SECONDS)
+    if thread is None or not thread.is_alive():
+        # Lines queued behind the stop marker would otherwise never be written
+        while True:
+            try:
+                item = _LOG_QUEUE.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _LOG_STOP:
+                _write_log_line(*item)
+
+
+def _start_log_writer() -> bool:
+    """Start the background writer on first use (thread-safe); False once it has stopped."""
+    global _LOG_THREAD
+    with _LOG_THREAD_LOCK:
+        if _LOG_CLOSED:
+            return False
+        if _LOG_THREAD is None:
+            thread = threading.Thread(target=_log_worker, name="terminal-log", daemon=True)
+            thread.start()
+            _LOG_THREAD = thread
+            atexit.register(_drain_log)
+        return True
+
+
+def _log_to_file(text: str):
+    """Queue timestamped text for the terminal log file (written on a background thread)."""
+    if _LOG_THREAD is None and not _start_log_writer():
+        # The writer was stopped at interpreter exit (e.g. a later atexit handler is logging)
+        _write_log_line(time.time(), text)
+        return
+    _LOG_QUEUE.put((time.time(), text))
+
+
 def cprint(text: str, end: str = "\n"):
     """Print text safely with UTF-8 fallback and mirror to terminal log."""
-    try:
-        print(text, end=end)
+    line = f"{text}{end}"
+    if _SAFE_STDOUT:
+        sys.stdout.write(line)
         if end != "\n":
             sys.stdout.flush()
-    except UnicodeEncodeError:
+    else:
         try:
-            sys.stdout.buffer.write((text + end).encode("utf-8", errors="ignore"))
-            sys.stdout.flush()
-        except Exception:
-            pass
+            sys.stdout.write(line)
+            if end != "\n":
+                sys.stdout.flush()
+        except UnicodeEncodeError:
+            try:
+                sys.stdout.buffer.write(line.encode("utf-8", errors="ignore"))
+                sys.stdout.flush()
+            except Exception:
+                pass
 
     # Mirror to log file with a timestamp (only when ending a line)
     if end == "\n":
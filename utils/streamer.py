@@ -1,11 +1,19 @@
 """Streaming helpers for ChatGPT-like APIs."""
 import asyncio
-import json
+import re
 import threading
-from typing import List, Optional, Tuple
-import requests
+from collections import deque
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
 from utils.config import load_api_settings_from_files, OPENAI_SETTINGS
+from utils.http_client import get_session
+from utils.fast_json import dumps as json_dumps, loads as json_loads
+
+if TYPE_CHECKING:
+    import requests
+
+# Sentence terminators that end a streamed clause
+_SENTENCE_END = re.compile(r"[.?!]")
 
 
 class ChatGPTSentenceStreamer:
@@ -17,6 +25,7 @@ class ChatGPTSentenceStreamer:
         model: Optional[str] = None,
         temperature: Optional[float] = None,
         system_prompt: str = "",
+        session: Optional["requests.Session"] = None,
     ):
         load_api_settings_from_files()
         self.user_content = user_content
@@ -24,51 +33,99 @@ class ChatGPTSentenceStreamer:
         default_temp = OPENAI_SETTINGS["reasoning_temperature"]
         self.temperature = temperature if temperature is not None else default_temp
         self.system_prompt = system_prompt
+        # Constant for the streamer's lifetime; reused in every payload
+        self._system_message = {"role": "system", "content": system_prompt}
         self.api_key = OPENAI_SETTINGS["api_key"]
         if not self.api_key:
             raise RuntimeError("Please configure a valid API key.")
         self.base_url = OPENAI_SETTINGS["base_url"].rstrip("/")
         self.word_count = 0
+        self._in_word = False
+        # Defaults to the process-wide pooled session shared with the controller
+        self._session = session
 
     async def stream(self):
         """Yield sentence-like chunks asynchronously."""
-        queue: asyncio.Queue = asyncio.Queue()
         loop = asyncio.get_running_loop()
+        # The producer thread appends here; deque append/popleft are thread-safe
+        pending: deque = deque()
+        ready = asyncio.Event()
+        wake_scheduled = threading.Event()
+        # Set when the consumer stops early so the producer drops the HTTP stream
+        stop = threading.Event()
+
+        def wake():
+            wake_scheduled.clear()
+            ready.set()
+
+        def push(item):
+            pending.append(item)
+            # One loop callback per batch: skip scheduling while a wake-up is already queued
+            if not wake_scheduled.is_set():
+                wake_scheduled.set()
+                loop.call_soon_threadsafe(wake)
 
         def producer():
             try:
-                for clause in self._generate_clauses():
-                    loop.call_soon_threadsafe(queue.put_nowait, clause)
+                for clause in self._generate_clauses(stop):
+                    push(clause)
             except Exception as exc:
-                loop.call_soon_threadsafe(queue.put_nowait, exc)
+                push(exc)
             finally:
-                loop.call_soon_threadsafe(queue.put_nowait, None)
+                push(None)
 
         thread = threading.Thread(target=producer, daemon=True)
         thread.start()
 
-        while True:
-            item = await queue.get()
-            if item is None:
-                break
-            if isinstance(item, Exception):
-                raise item
-            yield item
+        done = False
+        try:
+            while not done:
+                while pending:
+                    item = pending.popleft()
+                    if item is None:
+                        done = True
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+                if done:
+                    break
+                ready.clear()
+                if not pending:
+                    await ready.wait()
+        finally:
+            # Closed or cancelled mid-stream: stop generating (and paying for) tokens
+            stop.set()
 
         thread.join()
 
-    def _generate_clauses(self):
+    def _generate_clauses(self, stop: Optional[threading.Event] = None):
         buffer = ""
-        for token in self._token_stream():
+        for token in self._token_stream(stop):
+            # The carried-over remainder has no terminators, so only scan the new token
+            scan_from = len(buffer)
             buffer += token
-            self.word_count = len(buffer.split())
-            ready, buffer = self._pop_ready_clauses(buffer)
+            self._count_new_words(token)
+            ready, buffer = self._pop_ready_clauses(buffer, scan_from)
             for clause in ready:
                 yield clause
         if buffer.strip():
             yield buffer.strip()
 
-    def _token_stream(self):
+    def _count_new_words(self, token: str):
+        """Add the words started in token to word_count, carrying word state across tokens."""
+        in_word = self._in_word
+        count = 0
+        for char in token:
+            if char.isspace():
+                in_word = False
+            elif not in_word:
+                count += 1
+                in_word = True
+        self._in_word = in_word
+        self.word_count += count
+
+    def _token_stream(self, stop: Optional[threading.Event] = None):
         url = f"{self.base_url}/v1/chat/completions"
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -79,40 +136,61 @@ class ChatGPTSentenceStreamer:
             "temperature": self.temperature,
             "stream": True,
             "messages": [
-                {"role": "system", "content": self.system_prompt},
+                self._system_message,
                 {"role": "user", "content": self.user_content},
             ],
         }
 
-        with requests.post(url, headers=headers, json=payload, stream=True, timeout=90) as resp:
+        body = json_dumps(payload)
+        session = self._session or get_session()
+        with session.post(url, headers=headers, data=body, stream=True, timeout=90) as resp:
             resp.raise_for_status()
-            for line in resp.iter_lines(decode_unicode=True):
-                if not line:
-                    continue
-                if line.startswith("data:"):
-                    data = line.split("data:", 1)[1].strip()
-                else:
-                    data = line.strip()
-                if not data:
-                    continue
-                if data == "[DONE]":
+            for data in self._iter_sse_data(resp):
+                if data == b"[DONE]" or (stop is not None and stop.is_set()):
+                    # Leaving the block closes the response, which ends the request upstream
                     break
-                chunk = json.loads(data)
+                chunk = json_loads(data)
                 delta = chunk["choices"][0]["delta"].get("content")
                 if delta:
                     yield delta
 
     @staticmethod
-    def _pop_ready_clauses(text: str) -> Tuple[List[str], str]:
-        """Split accumulated text by sentence boundaries."""
+    def _iter_sse_data(resp):
+        """Yield the raw payload of each SSE line, splitting on bytes without per-line decoding."""
+        buf = bytearray()
+        # A small fixed size: with chunk_size=None a Content-Length (non-chunked) body is read
+        # whole before anything is yielded; chunked bodies still hand over each chunk as it lands
+        for raw in resp.iter_content(chunk_size=1024):
+            if not raw:
+                continue
+            buf.extend(raw)
+            start = 0
+            idx = buf.find(b"\n", start)
+            while idx != -1:
+                line = bytes(buf[start:idx]).strip()
+                start = idx + 1
+                if line.startswith(b"data:"):
+                    line = line[5:].lstrip()
+                if line:
+                    yield line
+                idx = buf.find(b"\n", start)
+            del buf[:start]
+        tail = bytes(buf).strip()
+        if tail.startswith(b"data:"):
+            tail = tail[5:].lstrip()
+        if tail:
+            yield tail
+
+    @staticmethod
+    def _pop_ready_clauses(text: str, scan_from: int = 0) -> Tuple[List[str], str]:
+        """Split accumulated text by sentence boundaries found at or after scan_from."""
         clauses: List[str] = []
         start = 0
-        for idx, char in enumerate(text):
-            if char in ".?!":
-                clause = text[start : idx + 1].strip()
-                if clause:
-                    clauses.append(clause)
-                start = idx + 1
+        for match in _SENTENCE_END.finditer(text, scan_from):
+            end = match.end()
+            clause = text[start:end].strip()
+            if clause:
+                clauses.append(clause)
+            start = end
         remainder = text[start:]
         return clauses, remainder
-
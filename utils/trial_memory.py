@@ -1,22 +1,57 @@
 """Trial memory helper: persist and replay prior Q&A runs with fuzzy matching."""
+import copy
 import json
+import os
 import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from difflib import SequenceMatcher
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from utils.print_utils import cprint
+from utils.fast_json import dumps as json_dumps, dumps_pretty as json_dumps_pretty, loads as json_loads
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:
+    # rapidfuzz is optional; it only narrows the candidates, difflib scores them either way
+    fuzz = process = None
 
 
 DEFAULT_TRIALS_PATH = Path(__file__).resolve().parent.parent / "my_trials.json"
 
+# One worker keeps background writes in order; pending writes finish before interpreter exit
+_WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trial-writer")
+# Saves are appended to a JSONL journal next to the trials file; after this many appends the
+# journal is folded back into the (pretty-printed) trials file and emptied
+COMPACT_EVERY = 32
+
+# Non-word runs (\w covers unicode letters/numbers/underscore) and whitespace runs
+_NON_WORD_RE = re.compile(r"[^\w]+")
+_WHITESPACE_RE = re.compile(r"\s+")
+# Index aliases such as "question1", "q 2" or "Q03" anywhere in the text
+_ALIAS_RE = re.compile(r"\bq(?:uestion)?\s*0*([0-9]+)\b")
+
 
+@lru_cache(maxsize=4096)
 def _normalize_text(text: str) -> str:
     """Lowercase, strip punctuation, collapse whitespace for fuzzy matching."""
-    lowered = text.lower()
-    # Replace non-word chars with space; \w covers unicode letters/numbers/underscore
-    cleaned = re.sub(r"[^\w]+", " ", lowered)
-    return re.sub(r"\s+", " ", cleaned).strip()
+    cleaned = _NON_WORD_RE.sub(" ", text.lower())
+    return _WHITESPACE_RE.sub(" ", cleaned).strip()
+
+
+def _clone_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a normalized record: strings are shared, only the containers are rebuilt."""
+    return {
+        "question": record["question"],
+        "answer": record["answer"],
+        "thinking_cues": list(record["thinking_cues"]),
+        # The decision nests the behavior plan (lists of dicts), so it needs a deep copy
+        "decision": copy.deepcopy(record["decision"]),
+        "final_confidence": record["final_confidence"],
+    }
 
 
 class TrialMemory:
@@ -30,6 +65,15 @@ class TrialMemory:
         self._norm_index: Dict[str, str] = {}
         # Preserve file order to allow question aliases like "question1"
         self._ordered_questions: List[str] = []
+        # Answers remembered for this process only, keyed by normalized question; they replay
+        # on an exact normalized match only, never through the fuzzy search
+        self._session_records: Dict[str, Dict[str, Any]] = {}
+        # Append-only journal of saves not yet folded into the trials file
+        self.journal_path = self.path.with_suffix(".jsonl")
+        self._journal_fp = None
+        self._journal_entries = 0
+        # Serializes file writes from the background writer and direct save_record calls
+        self._write_lock = threading.Lock()
         self._load()
 
     def _normalize_record(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -74,22 +118,14 @@ class TrialMemory:
         }
 
     def _load(self):
-        """Load trials from disk."""
-        if not self.path.exists():
-            self.records = {}
-            self._norm_index = {}
-            self._ordered_questions = []
-            return
-
-        try:
-            with self.path.open("r", encoding="utf-8") as fp:
-                data = json.load(fp)
-        except Exception as err:
-            cprint(f"[TrialMemory] Failed to load {self.path.name}: {err}")
-            self.records = {}
-            self._norm_index = {}
-            self._ordered_questions = []
-            return
+        """Load trials from disk, then replay saves still in the journal."""
+        data = None
+        if self.path.exists():
+            try:
+                with self.path.open("r", encoding="utf-8") as fp:
+                    data = json.load(fp)
+            except Exception as err:
+                cprint(f"[TrialMemory] Failed to load {self.path.name}: {err}")
 
         records: Dict[str, Dict[str, Any]] = {}
         ordered_questions: List[str] = []
@@ -115,27 +151,84 @@ class TrialMemory:
                 for entry in container:
                     upsert(entry)
 
+        for entry in self._read_journal():
+            normalized = self._normalize_record(entry)
+            if normalized:
+                if normalized["question"] not in records:
+                    ordered_questions.append(normalized["question"])
+                records[normalized["question"]] = normalized
+                self._journal_entries += 1
+
         self.records = records
         self._ordered_questions = ordered_questions
         self._reindex()
 
+    def _read_journal(self) -> List[Any]:
+        """Return the journal entries; a torn last line from a crash is skipped."""
+        try:
+            raw = self.journal_path.read_bytes()
+        except FileNotFoundError:
+            return []
+        except OSError as err:
+            cprint(f"[TrialMemory] Failed to load {self.journal_path.name}: {err}")
+            return []
+        entries = []
+        for line in raw.splitlines():
+            if not line.strip():
+                continue
+            try:
+                entries.append(json_loads(line))
+            except ValueError:
+                continue
+        return entries
+
     def _reindex(self):
         """Build normalized index for quick exact/fuzzy matching."""
         self._norm_index = {}
         for question in self.records:
-            norm = _normalize_text(question)
-            if norm:
-                self._norm_index[norm] = question
+            self._index_one(question)
+
+    def _index_one(self, question: str):
+        """Add or refresh the normalized index entry for one question."""
+        norm = _normalize_text(question)
+        if norm:
+            self._norm_index[norm] = question
 
     def _best_fuzzy_match(self, norm_question: str) -> Optional[Tuple[str, float]]:
         """Return the closest match if above threshold."""
+        candidates = self._norm_index.keys()
+        if process is not None:
+            # fuzz.ratio is an LCS-based score that is never below difflib's ratio, so this C++
+            # scan only prefilters; the survivors are scored by difflib below, on the same scale
+            candidates = [
+                norm_candidate
+                for norm_candidate, _, _ in process.extract(
+                    norm_question,
+                    candidates,
+                    scorer=fuzz.ratio,
+                    score_cutoff=self.match_threshold * 100,
+                    limit=None,
+                )
+            ]
+
         best_question = None
         best_score = 0.0
-        for norm_candidate, original_question in self._norm_index.items():
-            score = SequenceMatcher(None, norm_question, norm_candidate).ratio()
+        threshold = self.match_threshold
+        matcher = SequenceMatcher(None, norm_question)
+        for norm_candidate in candidates:
+            matcher.set_seq2(norm_candidate)
+            # Cheap upper bounds first (length, then character counts): skip candidates that
+            # can neither reach the threshold nor beat the current best
+            bound = matcher.real_quick_ratio()
+            if bound < threshold or bound <= best_score:
+                continue
+            bound = matcher.quick_ratio()
+            if bound < threshold or bound <= best_score:
+                continue
+            score = matcher.ratio()
             if score > best_score:
                 best_score = score
-                best_question = original_question
+                best_question = self._norm_index[norm_candidate]
         if best_question is None:
             return None
         if best_score >= self.match_threshold:
@@ -144,11 +237,10 @@ class TrialMemory:
 
     def _resolve_index_alias(self, text: str) -> Optional[str]:
         """Allow aliases like 'question1', 'q1' even when embedded in a sentence."""
-        lowered = text.lower()
-        matches = re.findall(r"\bq(uestion)?\s*0*([0-9]+)\b", lowered)
+        matches = _ALIAS_RE.findall(text.lower())
         if not matches:
             return None
-        for _, num in matches:
+        for num in matches:
             try:
                 idx = int(num)
             except ValueError:
@@ -158,7 +250,7 @@ class TrialMemory:
         return None
 
     def get(self, question: str) -> Optional[Dict[str, Any]]:
-        """Return a deep-ish copy of a stored record for the question (fuzzy)."""
+        """Return a copy of a stored record for the question (fuzzy)."""
         key = question.strip()
         if not key:
             return None
@@ -168,18 +260,21 @@ class TrialMemory:
         if alias_question:
             record = self.records.get(alias_question)
             if record:
-                return json.loads(json.dumps(record))
+                return _clone_record(record)
 
         norm = _normalize_text(key)
         if not norm:
             return None
 
-        # Exact normalized hit
+        # Exact normalized hit, session answers first (they are newer than the file)
+        record = self._session_records.get(norm)
+        if record:
+            return _clone_record(record)
         original = self._norm_index.get(norm)
         if original:
             record = self.records.get(original)
             if record:
-                return json.loads(json.dumps(record))
+                return _clone_record(record)
 
         # Fuzzy best-match (always returns best candidate)
         match = self._best_fuzzy_match(norm)
@@ -188,26 +283,82 @@ class TrialMemory:
             cprint(f"[TrialMemory] Fuzzy matched to: {matched_question} (score={score:.2f})")
             record = self.records.get(matched_question)
             if record:
-                return json.loads(json.dumps(record))
+                return _clone_record(record)
 
         return None
 
     def save_record(self, record: Dict[str, Any]):
         """Persist a new/updated record to disk."""
+        write = self._plan_write(record)
+        if write is not None:
+            # Through the writer too, so journal appends and compactions stay in order
+            _WRITER.submit(write).result()
+
+    def save_record_in_background(self, record: Dict[str, Any]) -> Optional[Future]:
+        """Update the in-memory records now and write the file on the writer thread."""
+        write = self._plan_write(record)
+        if write is None:
+            return None
+        return _WRITER.submit(write)
+
+    def remember(self, record: Dict[str, Any]) -> bool:
+        """Keep a record in memory only; this process replays it for the exact same question."""
         normalized = self._normalize_record(record)
         if not normalized:
-            return
+            return False
+        norm = _normalize_text(normalized["question"])
+        if not norm:
+            return False
+        self._session_records[norm] = normalized
+        return True
+
+    def _apply_record(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Add/replace a record in memory and return its normalized form."""
+        normalized = self._normalize_record(record)
+        if not normalized:
+            return None
 
         self.records[normalized["question"]] = normalized
-        self._reindex()
-        self._write()
+        # Only this question changed, so update its index entry instead of rebuilding
+        self._index_one(normalized["question"])
+        return normalized
+
+    def _plan_write(self, record: Dict[str, Any]) -> Optional[Callable[[], None]]:
+        """Apply a record in memory and return the file write that persists it."""
+        normalized = self._apply_record(record)
+        if normalized is None:
+            return None
+        self._journal_entries += 1
+        if self._journal_entries >= COMPACT_EVERY:
+            self._journal_entries = 0
+            return partial(self._compact, list(self.records.values()))
+        return partial(self._append, normalized)
+
+    def _append(self, entry: Dict[str, Any]):
+        """Append one record to the journal (the trials file is left untouched)."""
+        try:
+            with self._write_lock:
+                if self._journal_fp is None:
+                    self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+                    self._journal_fp = self.journal_path.open("ab")
+                self._journal_fp.write(json_dumps(entry) + b"\n")
+                self._journal_fp.flush()
+        except Exception as err:
+            cprint(f"[TrialMemory] Failed to write {self.journal_path.name}: {err}")
 
-    def _write(self):
-        """Write the current records to disk."""
+    def _compact(self, payload: List[Dict[str, Any]]):
+        """Rewrite the trials file from a snapshot, then empty the journal it now contains."""
         try:
-            self.path.parent.mkdir(parents=True, exist_ok=True)
-            payload = list(self.records.values())
-            with self.path.open("w", encoding="utf-8") as fp:
-                json.dump(payload, fp, indent=2, ensure_ascii=False)
+            with self._write_lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                # Write aside and swap in, so a crash never leaves a half-written trials file
+                tmp_path = self.path.with_name(self.path.name + ".tmp")
+                tmp_path.write_bytes(json_dumps_pretty(payload))
+                os.replace(tmp_path, self.path)
+                if self._journal_fp is not None:
+                    self._journal_fp.close()
+                    self._journal_fp = None
+                if self.journal_path.exists():
+                    self.journal_path.unlink()
         except Exception as err:
             cprint(f"[TrialMemory] Failed to write {self.path.name}: {err}")